@@ -0,0 +1,91 @@
+"""Parse throughput of the squeue text and JSON backends.
+
+Builds a synthetic 100k-job capture in both formats (or reads a real one)
+and reports rows per second for each parser::
+
+    python benchmarks/bench_parse.py [--rows N] [--text FILE] [--json FILE]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from swatch.jobs import TEST_SQUEUE_OUTPUT, parse_squeue_output
+from swatch.squeue import parse_squeue_json
+
+STATES = ("RUNNING", "PENDING", "COMPLETING", "RUNNING")
+REPEATS = 5
+
+
+def make_text(rows):
+    lines = [TEST_SQUEUE_OUTPUT.split("\n", 1)[0]]
+    for i in range(rows):
+        # Every 50th name contains the delimiter
+        name = f"sweep|{i % 100}" if i % 50 == 0 else f"sweep_{i % 100}"
+        lines.append(f"{200000 + i}|{name}|{STATES[i % 4]}|{i % 60}:{i % 60:02d}|1|"
+                     f"{4 * (1 + i % 4)}|{4000 * (1 + i % 8)}|1:00:00|{200000 + i}|N/A")
+    return "\n".join(lines)
+
+
+def make_json(rows, now):
+    def number(value):
+        return {"set": True, "infinite": False, "number": value}
+
+    jobs = []
+    for i in range(rows):
+        jobs.append({
+            "job_id": 200000 + i,
+            "name": f"sweep_{i % 100}",
+            "user_name": "bench",
+            "job_state": [STATES[i % 4]],
+            "start_time": number(now - i % 3600),
+            "end_time": number(now + 3600),
+            "time_limit": number(60),
+            "node_count": number(1),
+            "cpus": number(4 * (1 + i % 4)),
+            "memory_per_node": number(4000 * (1 + i % 8)),
+            "memory_per_cpu": {"set": False, "infinite": False, "number": 0},
+            "array_job_id": number(0),
+            "array_task_id": {"set": False, "infinite": False, "number": 0},
+            "array_task_string": "",
+        })
+    return json.dumps({"jobs": jobs})
+
+
+def throughput(parse, capture):
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        jobs = parse(capture)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(jobs), len(jobs) / best, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--text", help="squeue -o SQUEUE_FORMAT capture to parse instead")
+    parser.add_argument("--json", help="squeue --json capture to parse instead")
+    args = parser.parse_args()
+
+    now = time.time()
+    text = open(args.text).read() if args.text else make_text(args.rows)
+    data = open(args.json).read() if args.json else make_json(args.rows, now)
+
+    print(f"{'backend':>8} {'rows':>8} {'MB':>7} {'best ms':>9} {'rows/sec':>12}")
+    for label, parse, capture in (
+        ("text", parse_squeue_output, text),
+        ("json", lambda output: parse_squeue_json(output, now=now), data),
+    ):
+        rows, rate, best = throughput(parse, capture)
+        print(f"{label:>8} {rows:>8} {len(capture) / 1e6:>7.1f} {best * 1000:>9.1f} {rate:>12,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
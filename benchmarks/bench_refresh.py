@@ -0,0 +1,180 @@
+"""Time each stage of a refresh across job counts.
+
+Stages, each measured on its own:
+
+    command        SlurmClient.run_remote_command for squeue (the simulated
+                   cluster from --test-jobs stands in for SSH; add
+                   --latency to model the network)
+    parse          parse_squeue_output on the captured output, as get_jobs does
+    format_memory  JobInfo.format_memory over every captured memory value
+    render         HPCJobMonitor._check_refresh_result filling the job table
+
+The render stage needs a display and is skipped without one; run the whole
+suite on a headless machine with::
+
+    xvfb-run python benchmarks/bench_refresh.py --output results.json
+
+Results are written as JSON. Pass a previous file with --compare to fail
+(exit status 1) when a stage got slower than --tolerance allows::
+
+    python benchmarks/bench_refresh.py --output new.json --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Keep the user's saved login and cache out of the measurements
+os.environ["HOME"] = tempfile.mkdtemp(prefix="swatch-bench-")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from swatch.client import SlurmClient
+from swatch.jobs import JobInfo, parse_squeue_output
+from swatch.synthetic import SyntheticCluster
+
+DEFAULT_JOBS = (1000, 10000, 100000)
+
+
+def _timed(func, repeat):
+    """Run ``func`` ``repeat`` times; return its last result and the timings in ms"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, timings
+
+
+def _record(stage, jobs, rows, timings):
+    return {
+        "stage": stage,
+        "jobs": jobs,
+        "rows": rows,
+        "runs": len(timings),
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "max_ms": round(max(timings), 3),
+    }
+
+
+def _make_app():
+    """Return a test-mode HPCJobMonitor with its timers stopped, or None without a display"""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"render stage skipped: no display ({e})", file=sys.stderr)
+        return None
+    from swatch.slurm_watch import HPCJobMonitor
+    app = HPCJobMonitor(root, test_mode=True)
+    app.auto_refresh.set(False)
+    app.stop_auto_refresh()
+    root.update()
+    return app
+
+
+def run_suite(job_counts, repeat, latency, render):
+    results = []
+    app = _make_app() if render else None
+
+    for count in job_counts:
+        client = SlurmClient(test_mode=True, simulator=SyntheticCluster(count, latency=latency))
+        client.username = "bench"
+        client.connect()
+
+        output, timings = _timed(lambda: client.run_remote_command(client.squeue_command()), repeat)
+        rows = output.count("\n")
+        results.append(_record("command", count, rows, timings))
+
+        jobs, timings = _timed(lambda: parse_squeue_output(output), repeat)
+        results.append(_record("parse", count, len(jobs), timings))
+
+        memory = [line.rsplit("|", 3)[0].rsplit("|", 1)[1] for line in output.split("\n")[1:]]
+        _, timings = _timed(lambda: [JobInfo.format_memory(value) for value in memory], repeat)
+        results.append(_record("format_memory", count, len(memory), timings))
+
+        if app is not None:
+            def render_once():
+                # Start from an empty table so every run inserts all rows
+                app.cluster_jobs.clear()
+                app._render_jobs()
+                seq = app.refreshes.sequence(app.client)
+                app.result_queue.put(("refresh", app.client, seq, jobs, None, None))
+                app._check_refresh_result()
+                app.root.update_idletasks()
+            _, timings = _timed(render_once, repeat)
+            results.append(_record("render", count, len(jobs), timings))
+
+        for record in results[-4:]:
+            if record["jobs"] == count:
+                print(f"{record['stage']:>14} {count:>8} jobs  "
+                      f"median {record['median_ms']:>10.2f} ms  max {record['max_ms']:>10.2f} ms",
+                      file=sys.stderr)
+
+    if app is not None:
+        app.root.destroy()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a description of every stage slower than the baseline allows"""
+    before = {(r["stage"], r["jobs"]): r for r in baseline["results"]}
+    regressions = []
+    for record in results:
+        old = before.get((record["stage"], record["jobs"]))
+        if old is None or not old["median_ms"]:
+            continue
+        ratio = record["median_ms"] / old["median_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append(f"{record['stage']} at {record['jobs']} jobs: "
+                               f"{old['median_ms']:.2f} -> {record['median_ms']:.2f} ms "
+                               f"({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fetch, parse and render stages")
+    parser.add_argument("--jobs", type=int, nargs="+", default=DEFAULT_JOBS,
+                        help="Job counts to simulate (default: 1000 10000 100000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage (default: 5)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Simulated network latency per command in seconds")
+    parser.add_argument("--no-render", action="store_true", help="Skip the Tk render stage")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown before a stage counts as a regression (default: 0.25)")
+    args = parser.parse_args()
+
+    report = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": run_suite(args.jobs, args.repeat, args.latency, not args.no_render),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report["results"], json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Scroll and refresh latency of the job table at 1k, 10k and 100k rows.
+
+Compares the virtualized table used by the GUI against a plain Treeview
+holding every row. Needs a display; on a headless machine run it under
+Xvfb::
+
+    xvfb-run python benchmarks/bench_table.py
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import tkinter as tk
+from tkinter import ttk
+
+from swatch.slurm_watch import CustomTreeview, DarkTheme, VirtualJobTable
+
+SIZES = (1000, 10000, 100000)
+SCROLL_STEPS = 200
+# Fraction of rows that change state between two refreshes
+CHURN = 0.01
+
+
+def make_rows(count, generation=0):
+    """Return ``count`` synthetic rows; ``generation`` flips the state of CHURN of them"""
+    changed = int(count * CHURN) * generation
+    rows = []
+    for i in range(count):
+        status = "RUNNING" if i < changed else "PENDING"
+        rows.append((str(i), ("bench", str(100000 + i), f"job_{i}", status,
+                              "1:00:00", "1", "8", "16.0 GB"), "running"))
+    return rows
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def make_tree(root):
+    frame = tk.Frame(root)
+    frame.pack(fill=tk.BOTH, expand=True)
+    tree = CustomTreeview(frame, columns=DarkTheme.TREEVIEW_CONFIG["columns"],
+                          show="headings")
+    scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    root.update()
+    return frame, tree, scrollbar
+
+
+def bench_full(root, rows, refreshed):
+    """Every row is a Tk item, as before the table was virtualized"""
+    frame, tree, scrollbar = make_tree(root)
+    tree.configure(yscrollcommand=scrollbar.set)
+
+    def render(rows):
+        tree.sync_rows(rows)
+        root.update_idletasks()
+
+    initial = timed(render, rows)
+    refresh = timed(render, refreshed)
+
+    step = 1 / len(rows)
+    scroll = [timed(lambda i=i: (tree.yview_moveto(i * step), root.update_idletasks()))
+              for i in range(1, SCROLL_STEPS + 1)]
+    frame.destroy()
+    return initial, refresh, scroll
+
+
+def bench_virtual(root, rows, refreshed):
+    frame, tree, scrollbar = make_tree(root)
+    table = VirtualJobTable(tree, scrollbar)
+
+    def render(rows):
+        table.set_rows(rows)
+        root.update_idletasks()
+
+    initial = timed(render, rows)
+    refresh = timed(render, refreshed)
+
+    scroll = [timed(lambda i=i: (table.scroll_to(i), root.update_idletasks()))
+              for i in range(1, SCROLL_STEPS + 1)]
+    frame.destroy()
+    return initial, refresh, scroll
+
+
+def main():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No display available ({e}); run under xvfb-run")
+        return 1
+    root.geometry("1000x600")
+
+    print(f"{'rows':>8} {'table':>8} {'initial ms':>11} {'refresh ms':>11} "
+          f"{'scroll p50 ms':>14} {'scroll max ms':>14}")
+    for size in SIZES:
+        rows = make_rows(size)
+        refreshed = make_rows(size, generation=1)
+        for label, bench in (("full", bench_full), ("virtual", bench_virtual)):
+            initial, refresh, scroll = bench(root, rows, refreshed)
+            print(f"{size:>8} {label:>8} {initial:>11.1f} {refresh:>11.1f} "
+                  f"{statistics.median(scroll):>14.2f} {max(scroll):>14.2f}")
+
+    root.destroy()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Show each job array as one row instead of one row per task.
+
+squeue keeps the pending part of an array as a single record (``%K`` is a
+task range such as ``5-1000%10``) while every started task is a record of
+its own. Parameter sweeps would otherwise fill the table with thousands of
+near-identical rows, so the records of an array are grouped under one
+parent row with per-state counts. Task rows, including one per task of a
+pending range, are only built when the parent is expanded.
+"""
+
+from dataclasses import replace
+
+from .jobs import parse_duration, task_ranges
+
+# squeue's short state codes, used for the parent row's counts
+STATE_CODES = {
+    "RUNNING": "R",
+    "PENDING": "PD",
+    "COMPLETING": "CG",
+    "COMPLETED": "CD",
+    "CONFIGURING": "CF",
+    "SUSPENDED": "S",
+    "FAILED": "F",
+    "TIMEOUT": "TO",
+    "CANCELLED": "CA",
+    "OUT_OF_MEMORY": "OOM",
+    "NODE_FAIL": "NF",
+    "PREEMPTED": "PR",
+}
+
+
+class JobArray:
+    """The squeue records of one job array, summarized as a single row"""
+
+    def __init__(self, array_job_id, cluster=""):
+        self.array_job_id = array_job_id
+        self.cluster = cluster
+        self.records = []
+        self._tasks = None
+
+    def add(self, job):
+        self.records.append(job)
+        self._tasks = None
+
+    @property
+    def key(self):
+        """Return a row id that cannot clash with a task's JobInfo.key"""
+        prefix = f"{self.cluster}/" if self.cluster else ""
+        return f"{prefix}{self.array_job_id}_[*]"
+
+    @property
+    def display_id(self):
+        return f"{self.array_job_id}_[*]"
+
+    @property
+    def name(self):
+        return self.records[0].name
+
+    @property
+    def task_count(self):
+        return sum(job.task_count for job in self.records)
+
+    def counts(self):
+        """Return the number of tasks in each state"""
+        counts = {}
+        for job in self.records:
+            counts[job.status] = counts.get(job.status, 0) + job.task_count
+        return counts
+
+    @property
+    def status(self):
+        """Return per-state task counts, e.g. ``R:12 PD:488 F:2``"""
+        return " ".join(f"{STATE_CODES.get(state, state)}:{count}"
+                        for state, count in self.counts().items())
+
+    @property
+    def tag(self):
+        """Return the most urgent tag among the array's tasks"""
+        tags = {job.tag for job in self.records}
+        for tag in ("failed", "running", "pending"):
+            if tag in tags:
+                return tag
+        return "completed"
+
+    @property
+    def time(self):
+        """Return the longest runtime of any task"""
+        return max((job.time for job in self.records),
+                   key=lambda value: parse_duration(value) or 0)
+
+    # Tasks of an array normally request the same resources
+    @property
+    def nodes(self):
+        return self.records[0].nodes
+
+    @property
+    def cpus(self):
+        return self.records[0].cpus
+
+    @property
+    def memory(self):
+        return self.records[0].memory
+
+    def tasks(self):
+        """Return one JobInfo per task, expanding compressed pending ranges"""
+        if self._tasks is None:
+            self._tasks = []
+            for job in self.records:
+                if job.task_count == 1:
+                    self._tasks.append(job)
+                    continue
+                # Pending tasks have no job id of their own yet
+                for tasks in task_ranges(job.array_task_id):
+                    for task in tasks:
+                        self._tasks.append(replace(job, job_id=f"{self.array_job_id}_{task}",
+                                                   array_task_id=str(task)))
+        return self._tasks
+
+
+def group_arrays(jobs):
+    """Replace the records of each array with one JobArray at the array's first position"""
+    grouped = []
+    arrays = {}
+    for job in jobs:
+        if not job.is_array:
+            grouped.append(job)
+            continue
+        array = arrays.get((job.cluster, job.array_job_id))
+        if array is None:
+            array = arrays[(job.cluster, job.array_job_id)] = JobArray(job.array_job_id, job.cluster)
+            grouped.append(array)
+        array.add(job)
+    return grouped
@@ -0,0 +1,61 @@
+"""Several remote commands in one SSH round trip.
+
+Each command costs a full round trip (and a channel open) over SSH, which
+adds up on a high-latency link. A bundle joins the commands of one refresh
+into a single shell invocation, framing each command's output between
+marker lines carrying a random token, and ``split_bundle`` cuts the
+combined output back into one section per command.
+"""
+
+import secrets
+
+MARKER = "@@SWATCH"
+
+
+def new_token():
+    """Return a random token that command output will not contain by accident"""
+    return secrets.token_hex(8)
+
+
+def build_bundle(commands, token):
+    """Return one shell command running ``{name: command}`` in order.
+
+    Every command runs even if an earlier one fails; its exit status is
+    recorded in the closing marker.
+    """
+    parts = []
+    for name, command in commands.items():
+        parts.append(f"echo '{MARKER} {token} begin {name}'; {{ {command}\n}}; "
+                     f"printf '\\n{MARKER} {token} end %s\\n' $?")
+    return "; ".join(parts)
+
+
+def split_bundle(output, token):
+    """Return ``{name: (exit_status, output)}`` from a bundle's combined output.
+
+    A section whose closing marker is missing (the connection dropped, say)
+    is reported with exit status None.
+    """
+    begin = f"{MARKER} {token} begin "
+    end = f"\n{MARKER} {token} end "
+    sections = {}
+    rest = output
+    while True:
+        start = rest.find(begin)
+        if start < 0:
+            break
+        newline = rest.find("\n", start)
+        if newline < 0:
+            break
+        name = rest[start + len(begin):newline]
+        rest = rest[newline + 1:]
+        stop = rest.find(end)
+        if stop < 0:
+            sections[name] = (None, rest)
+            break
+        body = rest[:stop]
+        status_end = rest.find("\n", stop + len(end))
+        status = rest[stop + len(end):status_end if status_end >= 0 else None]
+        sections[name] = (int(status) if status.strip().isdigit() else None, body)
+        rest = rest[status_end + 1:] if status_end >= 0 else ""
+    return sections
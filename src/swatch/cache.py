@@ -0,0 +1,145 @@
+"""On-disk cache of the last job snapshot for each cluster and user.
+
+Lets SWATCH show the previous jobs immediately on launch, and keeps them
+visible when the connection drops. Finished jobs from sacct are kept here
+too, along with the high-water mark of the last history query.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .client import CONFIG_DIR
+from .jobs import JobInfo
+
+CACHE_FILE = os.path.join(CONFIG_DIR, "cache.db")
+
+
+class SnapshotCache:
+    """Store the most recent job list per (hostname, username) in SQLite"""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                " hostname TEXT NOT NULL,"
+                " username TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " jobs TEXT NOT NULL,"
+                " PRIMARY KEY (hostname, username))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                " hostname TEXT NOT NULL,"
+                " username TEXT NOT NULL,"
+                " job_id TEXT NOT NULL,"
+                " ended_at REAL NOT NULL,"
+                " job TEXT NOT NULL,"
+                " PRIMARY KEY (hostname, username, job_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS history_marks ("
+                " hostname TEXT NOT NULL,"
+                " username TEXT NOT NULL,"
+                " high_water TEXT NOT NULL,"
+                " PRIMARY KEY (hostname, username))"
+            )
+            self._initialized = True
+        return conn
+
+    def save(self, hostname, username, jobs, fetched_at=None):
+        """Replace the cached snapshot for a cluster and user"""
+        payload = json.dumps([job.to_dict() for job in jobs], separators=(",", ":"))
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                        (hostname, username, fetched_at or time.time(), payload)
+                    )
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Error writing snapshot cache: {e}")
+
+    def load(self, hostname, username):
+        """Return ``(fetched_at, jobs)`` for a cluster and user, or None"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT fetched_at, jobs FROM snapshots WHERE hostname = ? AND username = ?",
+                    (hostname, username)
+                ).fetchone()
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Error reading snapshot cache: {e}")
+            return None
+
+        if row is None:
+            return None
+        fetched_at, payload = row
+        return fetched_at, [JobInfo.from_dict(job) for job in json.loads(payload)]
+
+    def save_history(self, hostname, username, high_water, jobs, cutoff):
+        """Add finished jobs, advance the high-water mark and prune old records"""
+        rows = [(hostname, username, job.job_id, job.ended_at,
+                 json.dumps(job.to_dict(), separators=(",", ":"))) for job in jobs]
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?)", rows)
+                    conn.execute("INSERT OR REPLACE INTO history_marks VALUES (?, ?, ?)",
+                                 (hostname, username, high_water))
+                    conn.execute(
+                        "DELETE FROM history WHERE hostname = ? AND username = ? AND ended_at < ?",
+                        (hostname, username, cutoff)
+                    )
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Error writing job history: {e}")
+
+    def load_history(self, hostname, username, cutoff):
+        """Return ``(high_water, jobs)`` for jobs that ended after ``cutoff``, or None"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                mark = conn.execute(
+                    "SELECT high_water FROM history_marks WHERE hostname = ? AND username = ?",
+                    (hostname, username)
+                ).fetchone()
+                rows = conn.execute(
+                    "SELECT job FROM history WHERE hostname = ? AND username = ? AND ended_at >= ?",
+                    (hostname, username, cutoff)
+                ).fetchall()
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Error reading job history: {e}")
+            return None
+
+        if mark is None:
+            return None
+        return mark[0], [JobInfo.from_dict(json.loads(row[0])) for row in rows]
+
+
+def describe_age(fetched_at, now=None):
+    """Return a short human description of how old a snapshot is"""
+    age = max(0, int((now or time.time()) - fetched_at))
+    if age < 60:
+        return f"{age}s ago"
+    if age < 3600:
+        return f"{age // 60} min ago"
+    if age < 86400:
+        return f"{age // 3600} h ago"
+    return f"{age // 86400} d ago"
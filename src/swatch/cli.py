@@ -0,0 +1,105 @@
+"""Command line entry point for SWATCH.
+
+Arguments are parsed before any GUI module is imported so that headless
+mode never pays for loading tkinter or PIL.
+"""
+
+import time
+
+# Taken before anything heavy is imported, for --profile-startup
+START_TIME = time.perf_counter()
+
+import argparse
+import sys
+
+
+def build_parser():
+    """Return the argument parser shared by the GUI and headless modes"""
+    parser = argparse.ArgumentParser(description='Slurm Watch - A job monitoring tool')
+    parser.add_argument('-t', '--test',
+                       action='store_true',
+                       help='Run in test mode with sample data')
+    parser.add_argument('--test-jobs',
+                       type=int,
+                       metavar='N',
+                       help='Simulate N jobs (10 to 1,000,000) instead of the sample data; implies --test')
+    parser.add_argument('--test-latency',
+                       type=float,
+                       default=0.0,
+                       metavar='SEC',
+                       help='Delay added to every simulated command (default: 0)')
+    parser.add_argument('--test-jitter',
+                       type=float,
+                       default=0.0,
+                       metavar='SEC',
+                       help='Random +/- variation of the simulated delay (default: 0)')
+    parser.add_argument('--test-seed',
+                       type=int,
+                       default=0,
+                       help='Seed of the simulated workload (default: 0)')
+    parser.add_argument('--metrics-port',
+                       type=int,
+                       metavar='PORT',
+                       help='Serve Prometheus metrics on http://127.0.0.1:PORT/metrics')
+    parser.add_argument('--profile-startup',
+                       action='store_true',
+                       help='Report how long the window takes to appear')
+
+    headless = parser.add_argument_group('headless mode')
+    headless.add_argument('--headless',
+                         action='store_true',
+                         help='Stream jobs to stdout instead of opening a window')
+    headless.add_argument('--format',
+                         choices=('json', 'table'),
+                         default='json',
+                         help='Output format in headless mode (default: json)')
+    headless.add_argument('--events',
+                         action='store_true',
+                         help='After the first snapshot, only print added/changed/removed jobs')
+    headless.add_argument('--interval',
+                         type=float,
+                         default=30,
+                         help='Seconds between polls in headless mode (default: 30)')
+    headless.add_argument('--stream',
+                         action='store_true',
+                         help='Have a remote watcher push changes instead of polling squeue')
+    headless.add_argument('--history',
+                         action='store_true',
+                         help='Include recently finished jobs from sacct')
+    headless.add_argument('--cached',
+                         action='store_true',
+                         help='Print the last cached snapshot without connecting')
+    headless.add_argument('--once',
+                         action='store_true',
+                         help='Print a single snapshot and exit')
+    headless.add_argument('--scope',
+                         help='Jobs to list: user (default), all, account:NAME or partition:NAME')
+    headless.add_argument('--states',
+                         help='Only list jobs in these squeue states, e.g. R,PD')
+    headless.add_argument('--page',
+                         type=int,
+                         default=1,
+                         help='Page of a scope other than user to print, 5000 jobs each (default: 1)')
+    headless.add_argument('--user',
+                         help='Username (defaults to the saved login)')
+    headless.add_argument('--host',
+                         help='Login node hostname (defaults to the saved login)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.start_time = START_TIME
+    if args.test_jobs is not None:
+        args.test = True
+
+    if args.headless:
+        from .headless import run_headless
+        return run_headless(args)
+
+    from .slurm_watch import run_gui
+    return run_gui(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
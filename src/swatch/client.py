@@ -0,0 +1,397 @@
+"""Connection and job fetching logic shared by the GUI and headless modes.
+
+Nothing in this module imports tkinter or PIL, so it can be used on
+machines without a display.
+"""
+
+import json
+import os
+import shlex
+import signal
+import subprocess
+import time
+from datetime import datetime, timedelta
+
+from .bundle import build_bundle, new_token, split_bundle
+from .details import TEST_SCONTROL_OUTPUT, parse_scontrol_job
+from .history import TEST_SACCT_OUTPUT, JobHistory, merge_history
+from .jobs import SQUEUE_FORMAT, TEST_SQUEUE_OUTPUT, parse_squeue_output
+from .scope import Scope, parse_total
+from .squeue import choose_format, json_unsupported, parse_slurm_version, parse_squeue_json
+from .streaming import build_watch_command
+from .tail import GrowingTestLog
+from .usage import test_sstat_output
+
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".hpcjobmonitor")
+CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
+# Seconds a remote command or file read may go without sending anything
+# before it is given up, so a hung squeue cannot hold a worker forever
+COMMAND_TIMEOUT = 120
+READ_TIMEOUT = 30
+
+
+def load_config(config_file=CONFIG_FILE):
+    """Return the saved configuration, or an empty dict if there is none"""
+    try:
+        if os.path.exists(config_file):
+            with open(config_file, 'r') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Error loading config: {e}")
+    return {}
+
+
+class SlurmClient:
+    """Credentials, SSH session and squeue access for one cluster"""
+
+    def __init__(self, test_mode=False, on_connection_lost=None, name="",
+                 refresh_interval=None, cache=None, simulator=None):
+        self.test_mode = test_mode
+        # Optional SyntheticCluster answering commands in test mode
+        self.simulator = simulator
+        self.on_connection_lost = on_connection_lost
+        # Label used to tag jobs when several clusters are shown together
+        self.name = name
+        # Per-cluster polling period in seconds; None means the global setting
+        self.refresh_interval = refresh_interval
+        # Optional SnapshotCache that receives every successful fetch
+        self.cache = cache
+        # Finished jobs from sacct, fetched incrementally
+        self.history = JobHistory(cache)
+
+        self.username = ""
+        self.password = ""
+        self.hostname = ""
+        self.authenticated = False
+        self.session = None
+        # Optional Metrics that records every poll (see Metrics.track)
+        self.metrics = None
+        # squeue output to ask for ("text" or "json", the "squeue_format"
+        # config key), and what was negotiated with the cluster on first use
+        self.output_format = "text"
+        self.squeue_format = None
+        # Extra commands sent along with every refresh: name -> (command, handler)
+        self.probes = {}
+        # Which jobs to list, and how many matched at the last paged fetch
+        self.scope = Scope()
+        self.total_jobs = None
+        # Output files that grow on their own in test mode
+        self._test_log = GrowingTestLog() if test_mode else None
+
+    def connect(self):
+        """Open the persistent SSH session with the current credentials"""
+        if self.test_mode:
+            self.authenticated = True
+            return True  # Always return success in test mode
+
+        # Imported here so test mode works without paramiko installed
+        from .ssh_session import SSHSessionManager
+
+        print(f"Attempting connection to {self.hostname}...")
+        # Drop any session bound to old credentials
+        self.disconnect()
+        self.squeue_format = None
+        self.session = SSHSessionManager(self.hostname, self.username, self.password)
+
+        # A live, authenticated transport is proof enough; no echo round trip
+        started = time.monotonic()
+        connected = self.session.connect()
+        print(f"Connection test result: {'connected' if connected else 'failed'} "
+              f"({(time.monotonic() - started) * 1000:.0f} ms)")
+        self.authenticated = connected
+        return connected
+
+    def run_remote_command(self, command, errors=None):
+        """Run a command on the remote server via SSH.
+
+        Anything the command wrote to stderr is appended to ``errors``, a
+        list, if one is given.
+        """
+        if not self.authenticated:
+            return None
+
+        if self.test_mode:
+            if self.simulator is not None:
+                return self.simulator.run(command)
+            # Return test data when in test mode
+            if "squeue" in command:
+                return TEST_SQUEUE_OUTPUT
+            if command.startswith("scontrol show job"):
+                return TEST_SCONTROL_OUTPUT.format(job_id=command.split()[-1])
+            if command.startswith("sstat"):
+                return test_sstat_output(command.split()[-1].split(","))
+            if "sacct" in command:
+                now = datetime.now()
+                return now.strftime("%Y-%m-%dT%H:%M:%S\n") + TEST_SACCT_OUTPUT.format(
+                    end=(now - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S"))
+            return ""
+
+        if self.session is None:
+            return None
+
+        # Commands run on their own channels of the shared transport, so
+        # concurrent callers no longer serialize behind a lock
+        started = time.monotonic()
+        result = self.session.run(command, timeout=COMMAND_TIMEOUT)
+        if result is None:
+            if not self.session.is_alive():
+                # Reconnection failed; the transport is really gone
+                print("SSH connection lost and reconnection failed")
+                self.authenticated = False
+                if self.on_connection_lost:
+                    self.on_connection_lost()
+            return None
+
+        exit_status, output, error = result
+        if error and errors is not None:
+            errors.append(error)
+        if error and not output:
+            print(f"Command error after {(time.monotonic() - started) * 1000:.0f} ms: {error}")
+            return None
+
+        return output
+
+    def run_bundle(self, commands, errors=None):
+        """Run ``{name: command}`` in one round trip. Returns ``{name: output}``.
+
+        A command's output is None if it failed without printing anything.
+        Their combined stderr goes to ``errors`` (see run_remote_command).
+        """
+        if not commands:
+            return {}
+        if self.test_mode or len(commands) == 1:
+            # Test data is looked up per command; a lone command needs no framing
+            return {name: self.run_remote_command(command, errors)
+                    for name, command in commands.items()}
+
+        token = new_token()
+        sections = split_bundle(self.run_remote_command(build_bundle(commands, token), errors) or "",
+                                token)
+        outputs = {}
+        for name in commands:
+            status, output = sections.get(name, (None, ""))
+            outputs[name] = output if output or status == 0 else None
+        return outputs
+
+    def register_probe(self, name, command, handler):
+        """Send ``command`` along with every refresh and pass its output to ``handler``.
+
+        ``command`` may be a callable returning the command line, or None to
+        skip a refresh. ``handler`` receives the output, or None on failure.
+        """
+        self.probes[name] = (command, handler)
+
+    def unregister_probe(self, name):
+        self.probes.pop(name, None)
+
+    def _probe_commands(self):
+        commands = {}
+        for name, (command, handler) in list(self.probes.items()):
+            if callable(command):
+                command = command()
+            if command:
+                commands[name] = command
+        return commands
+
+    def _run_probe_handlers(self, outputs):
+        for name, output in outputs.items():
+            probe = self.probes.get(name)
+            if probe is None:
+                continue
+            try:
+                probe[1](output)
+            except Exception as e:
+                print(f"Error handling {name} output: {e}")
+
+    def squeue_command(self, header=True):
+        """Return the squeue command line listing the jobs in ``self.scope``.
+
+        Paged scopes never print a header; ``header`` then selects whether
+        the match count is appended instead.
+        """
+        args = self.scope.squeue_args(self.username)
+        if self.scope.paged:
+            return self.scope.paginate(f"squeue {args} -h -o '{SQUEUE_FORMAT}'", total=header)
+        no_header = "" if header else " -h"
+        return f"squeue {args}{no_header} -o '{SQUEUE_FORMAT}'"
+
+    def negotiate_format(self):
+        """Use squeue's JSON output if it was asked for and the cluster supports it"""
+        if self.squeue_format is None:
+            if self.output_format != "json" or self.test_mode:
+                self.squeue_format = "text"
+            else:
+                version = parse_slurm_version(self.run_remote_command("squeue --version"))
+                self.squeue_format = choose_format(version)
+                print(f"{self.hostname}: Slurm {version}, using {self.squeue_format} squeue output")
+        return self.squeue_format
+
+    def watch_command(self, interval):
+        """Return the remote loop that streams squeue deltas every ``interval`` s"""
+        squeue = self.squeue_command(header=False)
+        if self.test_mode and self.simulator is not None:
+            squeue = self.simulator.command_line()
+        elif self.test_mode:
+            # Replay the sample rows through the real watcher
+            rows = TEST_SQUEUE_OUTPUT.split("\n")[1:]
+            squeue = "printf '%s\\n' " + " ".join(shlex.quote(row) for row in rows)
+        return build_watch_command(squeue, interval)
+
+    def open_stream(self, command):
+        """Start a long-running command and return ``(lines, close)``.
+
+        ``lines`` iterates over the command's output as it arrives and
+        ``close`` terminates it. Returns None if no session is available.
+        """
+        if self.test_mode:
+            # Run locally so streaming can be exercised without a cluster
+            proc = subprocess.Popen(["sh", "-c", command], stdout=subprocess.PIPE,
+                                    text=True, bufsize=1, start_new_session=True)
+            return proc.stdout, lambda: os.killpg(proc.pid, signal.SIGTERM)
+
+        if not self.authenticated or self.session is None:
+            return None
+        channel = self.session.open_stream(command)
+        if channel is None:
+            return None
+        return channel.makefile("r"), channel.close
+
+    def _run_timed(self, commands, timing, errors=None):
+        if timing is None:
+            return self.run_bundle(commands, errors)
+        timing.mark("exec_start")
+        outputs = self.run_bundle(commands, errors)
+        timing.mark("exec_end")
+        timing.bytes = sum(len(output) for output in outputs.values() if output)
+        return outputs
+
+    def get_jobs(self, timing=None, history=False):
+        """Get job information from the HPC system.
+
+        squeue, sacct (with ``history``, when due) and every registered probe
+        go to the cluster in a single round trip. ``timing``, a
+        RefreshTiming, receives the SSH and parse timestamps.
+
+        Returns None if the fetch failed, so callers can tell an outage from
+        an empty queue.
+        """
+        if not self.authenticated:
+            return None
+
+        started = time.monotonic()
+        # Pages are cut from text rows; sacct history is the user's own jobs
+        json_output = self.negotiate_format() == "json" and not self.scope.paged
+        history = history and self.scope.kind == "user"
+        commands = {"squeue": f"squeue {self.scope.squeue_args(self.username)} --json" if json_output
+                    else self.squeue_command()}
+        if history:
+            self.history.bind(self.hostname, self.username)
+            if self.history.is_scheduled():
+                commands["sacct"] = self.history.command()
+        commands.update(self._probe_commands())
+
+        errors = []
+        outputs = self._run_timed(commands, timing, errors)
+        self._run_probe_handlers(outputs)
+
+        jobs = None
+        squeue_output = outputs["squeue"]
+        if json_output:
+            owner = self.username if self.scope.kind == "user" else None
+            jobs = (parse_squeue_json(squeue_output, cluster=self.name, username=owner)
+                    if squeue_output else None)
+            # Output that is not squeue JSON, or an error saying --json cannot
+            # work (e.g. no JSON data parser plugin), rules JSON out for good;
+            # a dropped channel or a controller timeout only fails this poll
+            if jobs is None and (squeue_output or json_unsupported("".join(errors))):
+                print(f"{self.hostname}: squeue --json unavailable, using text output")
+                self.squeue_format = "text"
+                squeue_output = self.run_remote_command(self.squeue_command())
+
+        if jobs is None:
+            if squeue_output is None:
+                if self.metrics is not None:
+                    self.metrics.observe_poll(self, time.monotonic() - started, None)
+                return None
+
+            jobs = parse_squeue_output(squeue_output, cluster=self.name)
+        self.total_jobs = parse_total(squeue_output) if self.scope.paged else None
+        if timing is not None:
+            timing.mark("parsed")
+        if self.metrics is not None:
+            self.metrics.observe_poll(self, time.monotonic() - started, jobs)
+        if self.cache is not None and self.scope.kind == "user":
+            self.cache.save(self.hostname, self.username, jobs)
+
+        if history:
+            if "sacct" in outputs:
+                if outputs["sacct"] is not None:
+                    self.history.apply(outputs["sacct"], cluster=self.name)
+                # sacct ran after squeue, so it already has any job that just left
+                self.history.is_due(jobs)
+                finished = self.history.jobs(cluster=self.name)
+            else:
+                finished = self.get_finished_jobs(jobs)
+            jobs = merge_history(jobs, finished)
+        return jobs
+
+    def get_finished_jobs(self, active_jobs=None):
+        """Return finished jobs from sacct, only transferring new ones.
+
+        Pass the latest squeue result as ``active_jobs`` to skip the sacct
+        call entirely when no job has left the queue. sacct history is the
+        user's own jobs, so other scopes get none.
+        """
+        if not self.authenticated or self.scope.kind != "user":
+            return []
+
+        self.history.bind(self.hostname, self.username)
+        if self.history.is_due(active_jobs):
+            output = self.run_remote_command(self.history.command())
+            if output is not None:
+                self.history.apply(output, cluster=self.name)
+        return self.history.jobs(cluster=self.name)
+
+    def get_job_details(self, job_id):
+        """Return ``scontrol show job`` for one job as a dict, or None"""
+        if not self.authenticated:
+            return None
+        return parse_scontrol_job(self.run_remote_command(f"scontrol show job {shlex.quote(job_id)}"))
+
+    def read_remote_file(self, path, offset, length):
+        """Return ``(size, data)``: up to ``length`` bytes of a remote file from ``offset``.
+
+        Read over SFTP on the existing connection; None if unreadable.
+        """
+        if not self.authenticated:
+            return None
+        if self.test_mode:
+            return self._test_log.read(path, offset, length)
+        if self.session is None:
+            return None
+        return self.session.read_file(path, offset, length, timeout=READ_TIMEOUT)
+
+    def load_cached_jobs(self):
+        """Return ``(fetched_at, jobs)`` from the snapshot cache, or None"""
+        # Only the user's own jobs are cached
+        if self.cache is None or not self.hostname or self.scope.kind != "user":
+            return None
+        cached = self.cache.load(self.hostname, self.username)
+        if cached is None:
+            return None
+        fetched_at, jobs = cached
+        for job in jobs:
+            # The label may have changed since the snapshot was taken
+            job.cluster = self.name
+        return fetched_at, jobs
+
+    def disconnect(self):
+        """Disconnect SSH session if connected"""
+        try:
+            if self.session:
+                print("Disconnecting...")
+                self.session.close()
+                self.session = None
+                print("Disconnected")
+        except Exception as e:
+            print(f"Error disconnecting: {e}")
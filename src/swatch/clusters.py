@@ -0,0 +1,80 @@
+"""Support for watching several Slurm clusters from one SWATCH instance.
+
+Extra clusters are listed in ``config.json`` next to the saved login::
+
+    {
+        "username": "me", "hostname": "login.cluster-a.edu", "password": "...",
+        "clusters": [
+            {"name": "b", "hostname": "login.cluster-b.edu",
+             "username": "me", "password": "...", "refresh_interval": 60}
+        ]
+    }
+
+Each cluster gets its own SlurmClient and therefore its own SSH session, and
+clusters are polled concurrently so a slow cluster never delays the others.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .client import SlurmClient
+
+
+def load_cluster_clients(config, test_mode=False, cache=None, simulator=None):
+    """Build a SlurmClient for every entry in the config's ``clusters`` list.
+
+    In test mode each cluster gets its own variant of ``simulator``, if given.
+    """
+    clients = []
+    for index, entry in enumerate(config.get("clusters", []), 1):
+        hostname = entry.get("hostname")
+        if not hostname:
+            print(f"Skipping cluster without hostname: {entry}")
+            continue
+        client = SlurmClient(
+            test_mode=test_mode,
+            name=entry.get("name") or hostname,
+            refresh_interval=entry.get("refresh_interval"),
+            cache=cache,
+            simulator=simulator.spawn(index) if simulator else None
+        )
+        client.hostname = hostname
+        client.username = entry.get("username", config.get("username", ""))
+        client.password = entry.get("password", "")
+        client.output_format = entry.get("squeue_format", config.get("squeue_format", "text"))
+        clients.append(client)
+    return clients
+
+
+def connect_all(clients):
+    """Connect every client concurrently. Returns the clients that connected."""
+    if not clients:
+        return []
+    with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+        results = list(executor.map(lambda client: client.connect(), clients))
+    return [client for client, ok in zip(clients, results) if ok]
+
+
+def _fetch(client, history):
+    return client.get_jobs(history=history)
+
+
+def fetch_all(clients, history=False):
+    """Fetch jobs from every client concurrently.
+
+    Returns a dict mapping cluster name to its job list, including finished
+    jobs from sacct if ``history`` is set, or to None if its fetch failed.
+    The call takes as long as the slowest cluster, not the sum of all of them.
+    """
+    if not clients:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+        results = list(executor.map(lambda client: _fetch(client, history), clients))
+    return {client.name: jobs for client, jobs in zip(clients, results)}
+
+
+def merge_jobs(jobs_by_cluster):
+    """Flatten per-cluster job lists into one list, ordered by cluster"""
+    merged = []
+    for name in sorted(jobs_by_cluster):
+        merged.extend(jobs_by_cluster[name])
+    return merged
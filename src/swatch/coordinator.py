@@ -0,0 +1,75 @@
+"""Single-flight refresh coordination.
+
+At most one fetch per cluster is in flight. A refresh requested while one
+is running (a manual refresh during a slow poll, say) is neither started
+alongside it nor dropped: it is remembered and run once, as a follow-up,
+when the running fetch finishes, however many requests came in meanwhile.
+
+Every fetch and every pushed update gets a sequence number when it starts,
+and a result is only applied if it is newer than the last one applied for
+its cluster, so a slow, older result can never overwrite a newer one.
+"""
+
+import threading
+
+
+class RefreshCoordinator:
+    """Track in-flight fetches, pending follow-ups and result order per cluster"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._follow_up = set()
+        self._issued = {}
+        self._applied = {}
+
+    def _next(self, key):
+        self._issued[key] = self._issued.get(key, 0) + 1
+        return self._issued[key]
+
+    def request(self, key):
+        """Ask to fetch ``key``. Returns a sequence number, or None if one is running."""
+        with self._lock:
+            if key in self._in_flight:
+                self._follow_up.add(key)
+                return None
+            self._in_flight.add(key)
+            return self._next(key)
+
+    def sequence(self, key):
+        """Return a sequence number for a result that was not requested (e.g. pushed)"""
+        with self._lock:
+            return self._next(key)
+
+    def finish(self, key):
+        """Mark the fetch of ``key`` done. Returns True if a follow-up was requested."""
+        with self._lock:
+            self._in_flight.discard(key)
+            if key in self._follow_up:
+                self._follow_up.discard(key)
+                return True
+            return False
+
+    def accept(self, key, seq):
+        """Return True if result ``seq`` is newer than anything applied for ``key``"""
+        with self._lock:
+            if seq <= self._applied.get(key, 0):
+                return False
+            self._applied[key] = seq
+            return True
+
+    def invalidate(self, key):
+        """Drop every result for ``key`` issued so far, e.g. after its query changed"""
+        with self._lock:
+            self._applied[key] = self._issued.get(key, 0)
+
+    def cancel_follow_up(self, key):
+        """Drop a pending follow-up, e.g. when the cluster's polling stops"""
+        with self._lock:
+            self._follow_up.discard(key)
+
+    @property
+    def busy(self):
+        """True while any fetch is in flight"""
+        with self._lock:
+            return bool(self._in_flight)
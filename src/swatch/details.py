@@ -0,0 +1,143 @@
+"""Per-job details from ``scontrol show job``, fetched on demand and cached.
+
+squeue only carries the columns of the job table. The detail panel shows
+what it leaves out (working directory, submit line, node list, pending
+reason, TRES), one job at a time, when a row is selected. Each lookup is a
+controller RPC, so answers are cached per job: for ``ttl`` seconds while
+the job can still change, and for good once it has reached a final state.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# scontrol JobState values after which nothing about a job changes
+TERMINAL_STATES = {"COMPLETED", "FAILED", "CANCELLED", "TIMEOUT", "OUT_OF_MEMORY",
+                   "NODE_FAIL", "PREEMPTED", "BOOT_FAIL", "DEADLINE"}
+
+# (label, scontrol keys in order of preference) shown in the detail panel
+DETAIL_FIELDS = (
+    ("Job", ("JobId",)),
+    ("Name", ("JobName",)),
+    ("User", ("UserId",)),
+    ("Account", ("Account",)),
+    ("Partition", ("Partition",)),
+    ("State", ("JobState",)),
+    ("Reason", ("Reason",)),
+    ("Submitted", ("SubmitTime",)),
+    ("Started", ("StartTime",)),
+    ("Nodes", ("NodeList",)),
+    ("TRES", ("AllocTRES", "TRES", "ReqTRES")),
+    ("Work dir", ("WorkDir",)),
+    ("Submit line", ("SubmitLine", "Command")),
+    ("Stdout", ("StdOut",)),
+    ("Stderr", ("StdErr",)),
+)
+
+# Canned record returned in test mode
+TEST_SCONTROL_OUTPUT = """JobId={job_id} JobName=test_job
+   UserId=testuser(1000) GroupId=testuser(1000) MCS_label=N/A
+   Priority=4294901720 Nice=0 Account=lab QOS=normal
+   JobState=RUNNING Reason=None Dependency=(null)
+   RunTime=00:10:23 TimeLimit=04:00:00 TimeMin=N/A
+   SubmitTime=2024-05-01T09:12:44 EligibleTime=2024-05-01T09:12:44
+   StartTime=2024-05-01T09:13:02 EndTime=2024-05-01T13:13:02 Deadline=N/A
+   Partition=compute AllocNode:Sid=login1:40211
+   NodeList=node[001-002]
+   NumNodes=2 NumCPUs=32 NumTasks=32 CPUs/Task=1 ReqB:S:C:T=0:0:*:*
+   TRES=cpu=32,mem=64G,node=2,billing=32
+   Command=/home/testuser/project/train.sh
+   WorkDir=/home/testuser/project
+   SubmitLine=sbatch --nodes=2 train.sh
+   StdErr=/home/testuser/project/slurm-{job_id}.out
+   StdOut=/home/testuser/project/slurm-{job_id}.out"""
+
+_KEY = re.compile(r"(?:^|\s)([A-Za-z][\w:/]*)=")
+
+
+def parse_scontrol_job(output):
+    """Return the first record of ``scontrol show job`` as a dict, or None.
+
+    Values may contain spaces, so each runs up to the next ``Key=``.
+    """
+    if not output:
+        return None
+    # Array jobs print one record per task, separated by blank lines
+    record = output.strip().split("\n\n", 1)[0]
+    matches = list(_KEY.finditer(record))
+    if not matches:
+        return None
+    details = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(record)
+        details[match.group(1)] = record[match.end():end].strip()
+    return details if "JobId" in details else None
+
+
+def format_details(details):
+    """Return ``(label, value)`` pairs of the fields worth showing"""
+    rows = []
+    for label, keys in DETAIL_FIELDS:
+        for key in keys:
+            value = details.get(key)
+            if value and value not in ("(null)", "N/A", "None"):
+                rows.append((label, value))
+                break
+    return rows
+
+
+def is_final(details):
+    return details.get("JobState", "").split(" ", 1)[0] in TERMINAL_STATES
+
+
+class DetailCache:
+    """Thread-safe cache of job details with a per-entry lifetime.
+
+    Also remembers which jobs are being fetched, so a lookup is never
+    started twice for the same job.
+    """
+
+    def __init__(self, ttl=60, max_entries=500):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pending = set()
+
+    def get(self, key):
+        """Return cached details for ``key`` if still fresh, else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, details = entry
+            if expires is not None and time.monotonic() >= expires:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return details
+
+    def begin(self, key):
+        """Mark ``key`` as being fetched. Returns False if it already is."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            return True
+
+    def put(self, key, details):
+        """Store a finished fetch; None (a failed one) is not cached"""
+        with self._lock:
+            self._pending.discard(key)
+            if details is None:
+                return
+            expires = None if is_final(details) else time.monotonic() + self.ttl
+            self._entries[key] = (expires, details)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def cancel(self, key):
+        with self._lock:
+            self._pending.discard(key)
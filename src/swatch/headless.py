@@ -0,0 +1,286 @@
+"""Headless mode: poll Slurm and stream job snapshots or changes to stdout.
+
+This module must never import tkinter or PIL so it can run on jump boxes
+and in cron jobs without a display.
+"""
+
+import contextlib
+import getpass
+import json
+import os
+import queue
+import sys
+import time
+from datetime import datetime
+
+from .cache import SnapshotCache, describe_age
+from .client import SlurmClient, load_config
+from .clusters import connect_all, fetch_all, load_cluster_clients, merge_jobs
+from .history import merge_history
+from .jobs import diff_jobs
+from .scope import Scope
+from .streaming import JobStream
+from .synthetic import SyntheticCluster
+
+TABLE_COLUMNS = (
+    ("cluster", "CLUSTER", 10),
+    ("display_id", "JOB ID", 18),
+    ("name", "NAME", 24),
+    ("status", "STATUS", 11),
+    ("time", "RUNTIME", 11),
+    ("nodes", "NODES", 5),
+    ("cpus", "CPUS", 5),
+    ("memory", "MEMORY", 8),
+)
+
+
+def _table_row(values):
+    return " ".join(str(value)[:width].ljust(width)
+                    for value, (_, _, width) in zip(values, TABLE_COLUMNS)).rstrip()
+
+
+class JsonLinesWriter:
+    """Write one JSON object per line"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def _write(self, record):
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+    def snapshot(self, timestamp, host, jobs):
+        self._write({
+            "type": "snapshot",
+            "time": timestamp,
+            "host": host,
+            "jobs": [job.to_dict() for job in jobs],
+        })
+
+    def changes(self, timestamp, host, added, changed, removed):
+        for kind, jobs in (("added", added), ("changed", changed)):
+            for job in jobs:
+                self._write({"type": kind, "time": timestamp, "host": host,
+                             "job": job.to_dict()})
+        for job_id in removed:
+            self._write({"type": "removed", "time": timestamp, "host": host,
+                         "job_id": job_id})
+
+
+class TableWriter:
+    """Write a compact fixed-width table for humans and simple pipelines"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def snapshot(self, timestamp, host, jobs):
+        lines = [f"# {host} {timestamp} ({len(jobs)} jobs)",
+                 _table_row([header for _, header, _ in TABLE_COLUMNS])]
+        for job in jobs:
+            lines.append(_table_row([getattr(job, key) for key, _, _ in TABLE_COLUMNS]))
+        self.stream.write("\n".join(lines) + "\n")
+        self.stream.flush()
+
+    def changes(self, timestamp, host, added, changed, removed):
+        lines = []
+        for marker, jobs in (("+", added), ("~", changed)):
+            for job in jobs:
+                row = _table_row([getattr(job, key) for key, _, _ in TABLE_COLUMNS])
+                lines.append(f"{timestamp} {marker} {row}")
+        for job_id in removed:
+            lines.append(f"{timestamp} - {job_id}")
+        if lines:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+
+
+WRITERS = {
+    "json": JsonLinesWriter,
+    "table": TableWriter,
+}
+
+
+def _configure_client(client, args, config):
+    """Fill in credentials from the command line, saved config or a prompt"""
+    client.username = args.user or config.get('username', '')
+    client.hostname = args.host or config.get('hostname', '')
+    client.password = os.environ.get("SWATCH_PASSWORD") or config.get('password', '')
+    client.output_format = config.get('squeue_format', 'text')
+    try:
+        client.scope = Scope.parse(args.scope or config.get('scope', 'user'),
+                                   args.states or config.get('scope_states', ''))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return False
+    client.scope.page = max(0, args.page - 1)
+
+    if client.test_mode:
+        client.username = client.username or "testuser"
+        client.hostname = client.hostname or "test.cluster"
+        return True
+
+    if not client.username or not client.hostname:
+        print("No saved login found; pass --user and --host", file=sys.stderr)
+        return False
+
+    if not client.password:
+        if not sys.stdin.isatty():
+            print("No password available; set SWATCH_PASSWORD or save credentials",
+                  file=sys.stderr)
+            return False
+        client.password = getpass.getpass(f"Password for {client.username}@{client.hostname}: ")
+    return True
+
+
+class _Emitter:
+    """Write the first result as a snapshot and, with --events, diffs after"""
+
+    def __init__(self, writer, host, events):
+        self.writer = writer
+        self.host = host
+        self.events = events
+        self.previous = None
+
+    def __call__(self, jobs):
+        timestamp = datetime.now().isoformat(timespec="seconds")
+        if self.events and self.previous is not None:
+            self.writer.changes(timestamp, self.host, *diff_jobs(self.previous, jobs))
+        else:
+            self.writer.snapshot(timestamp, self.host, jobs)
+        self.previous = jobs
+
+
+def _poll_jobs(clients, emit, args):
+    """Run squeue on every cluster each interval"""
+    # Last good jobs per cluster, shown again while a cluster's fetch fails
+    last = {}
+    while True:
+        started = time.monotonic()
+        jobs_by_cluster = fetch_all(clients, history=args.history)
+        for c in clients:
+            if jobs_by_cluster.get(c.name) is None:
+                print(f"{c.hostname}: fetch failed, showing the previous jobs", file=sys.stderr)
+                jobs_by_cluster[c.name] = last.get(c.name, [])
+        last = jobs_by_cluster
+        jobs = merge_jobs(jobs_by_cluster)
+        for lost in [c for c in clients if not c.authenticated]:
+            print(f"Connection to {lost.hostname} lost", file=sys.stderr)
+            clients.remove(lost)
+        if not clients:
+            return 1
+        for c in clients:
+            if c.scope.paged and c.total_jobs is not None:
+                print(f"{c.name or c.hostname}: page {c.scope.page + 1}, "
+                      f"{c.total_jobs:,} jobs in scope {c.scope}", file=sys.stderr)
+
+        emit(jobs)
+
+        if args.once:
+            return 0
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+
+def _stream_jobs(clients, emit, interval, history):
+    """Let a remote watcher on each cluster push changes as they happen"""
+    updates = queue.Queue()
+    streams = []
+    for client in clients:
+        stream = JobStream(client, interval,
+                           on_update=lambda jobs, client=client: updates.put((client, jobs)),
+                           on_closed=lambda client=client: updates.put((client, None)))
+        if stream.start():
+            streams.append(stream)
+        else:
+            print(f"Could not start job stream on {client.hostname}", file=sys.stderr)
+
+    jobs_by_cluster = {}
+    try:
+        while streams:
+            client, jobs = updates.get()
+            if jobs is None:
+                print(f"Job stream from {client.hostname} closed", file=sys.stderr)
+                streams = [s for s in streams if s.client is not client]
+                continue
+            if history:
+                jobs = merge_history(jobs, client.get_finished_jobs(jobs))
+            jobs_by_cluster[client.name] = jobs
+            emit(merge_jobs(jobs_by_cluster))
+    finally:
+        for stream in streams:
+            stream.stop()
+    return 1
+
+
+def _print_cached(clients, writer):
+    """Print the last cached snapshot of each cluster without connecting"""
+    found = False
+    for client in clients:
+        cached = client.load_cached_jobs()
+        if cached is None:
+            print(f"No cached jobs for {client.username}@{client.hostname}", file=sys.stderr)
+            continue
+        fetched_at, jobs = cached
+        print(f"{client.hostname}: cached {describe_age(fetched_at)}", file=sys.stderr)
+        timestamp = datetime.fromtimestamp(fetched_at).isoformat(timespec="seconds")
+        writer.snapshot(timestamp, f"{client.username}@{client.hostname}", jobs)
+        found = True
+    return 0 if found else 1
+
+
+def run_headless(args):
+    """Poll squeue and stream results until interrupted. Returns an exit code."""
+    out = sys.stdout
+    writer = WRITERS[args.format](out)
+
+    # Diagnostics from the client go to stderr so stdout stays parseable
+    with contextlib.redirect_stdout(sys.stderr):
+        config = load_config()
+        # Test mode never touches the cache so sample data can't overwrite real jobs
+        cache = None if args.test else SnapshotCache()
+        simulator = SyntheticCluster.from_args(args)
+        client = SlurmClient(test_mode=args.test, cache=cache, simulator=simulator)
+        if not args.cached and not _configure_client(client, args, config):
+            return 1
+
+        extra_clients = load_cluster_clients(config, test_mode=args.test, cache=cache,
+                                             simulator=simulator)
+        if extra_clients:
+            # Tag jobs from the saved login too once several clusters are mixed
+            client.name = config.get("name") or client.hostname
+        for extra in extra_clients:
+            extra.scope = client.scope
+
+        if args.cached:
+            client.username = args.user or config.get('username', '')
+            client.hostname = args.host or config.get('hostname', '')
+            return _print_cached([client] + extra_clients, writer)
+
+        clients = connect_all([client] + extra_clients)
+        for failed in [c for c in [client] + extra_clients if c not in clients]:
+            print(f"Could not connect to {failed.hostname}", file=sys.stderr)
+        if not clients:
+            return 1
+
+        if args.metrics_port:
+            from .metrics import Metrics, start_metrics_server
+            metrics = Metrics()
+            for c in clients:
+                metrics.track(c)
+            start_metrics_server(metrics, args.metrics_port)
+
+        host = ",".join(f"{c.username}@{c.hostname}" for c in clients)
+        emit = _Emitter(writer, host, args.events)
+        try:
+            if args.stream and not args.once:
+                return _stream_jobs(clients, emit, args.interval, args.history)
+            return _poll_jobs(clients, emit, args)
+        except KeyboardInterrupt:
+            pass
+        except BrokenPipeError:
+            # Downstream consumer (e.g. `head`) went away; silence the
+            # interpreter's flush of the dead pipe at exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())
+        finally:
+            for c in clients:
+                c.disconnect()
+    return 0
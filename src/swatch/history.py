@@ -0,0 +1,173 @@
+"""Incremental sacct history of finished jobs.
+
+squeue forgets jobs shortly after they finish. sacct remembers them, but
+re-reading days of accounting data on every poll is wasteful, so each
+query only asks for jobs that reached a terminal state since the previous
+successful query (the high-water mark). Finished jobs never change, so
+they are kept locally and only new ones are transferred. Days of history
+can be many thousands of jobs, so they are held in a compact JobStore.
+"""
+
+import time
+
+from .jobs import JobInfo
+from .store import JobStore
+
+# Terminal states requested from sacct
+SACCT_STATES = "CD,F,TO,CA,OOM,NF,PR,BF,DL"
+SACCT_FIELDS = "JobID,JobName,State,Elapsed,NNodes,NCPUS,ReqMem,End"
+
+# Canned sacct rows returned in test mode
+TEST_SACCT_OUTPUT = """12330|alignment_run|COMPLETED|1:02:11|1|16|32000M|{end}
+12331|variant_calling|FAILED|00:12:40|2|32|64G|{end}
+12332|hyperparam_sweep|TIMEOUT|4:00:00|1|8|16000Mn|{end}
+12333|stale_test|CANCELLED by 1001|00:00:05|1|1|1000M|{end}
+12351|failed_job|FAILED|05:21|2|64|128000M|{end}"""
+
+
+def parse_sacct_output(output, cluster=""):
+    """Parse ``sacct -P -o SACCT_FIELDS`` rows into finished JobInfo records.
+
+    The job name is taken as everything between the first field and the
+    last six, so names containing ``|`` do not shift the other columns.
+    """
+    jobs = []
+    for line in output.splitlines():
+        parts = line.split("|")
+        if len(parts) < 8:
+            continue
+        job_id = parts[0]
+        name = "|".join(parts[1:-6])
+        state, elapsed, nodes, cpus, memory, end = parts[-6:]
+        jobs.append(JobInfo(
+            job_id=job_id,
+            name=name,
+            # e.g. "CANCELLED by 1001"
+            status=state.split(" ", 1)[0],
+            time=elapsed,
+            nodes=nodes,
+            cpus=cpus,
+            memory=JobInfo.format_memory(memory),
+            cluster=cluster,
+            end_time=end
+        ))
+    return jobs
+
+
+class JobHistory:
+    """Finished jobs for one cluster and user, fetched incrementally.
+
+    ``retention_days`` bounds how far back finished jobs are kept and
+    requested on the first query.
+    """
+
+    def __init__(self, cache=None, retention_days=7, max_query_interval=600):
+        self.cache = cache
+        self.retention_days = retention_days
+        # sacct is queried when a job leaves the queue, and at least this
+        # often to catch jobs that finished between two polls
+        self.max_query_interval = max_query_interval
+
+        self.hostname = None
+        self.username = None
+        self.high_water = None
+        self._jobs = JobStore()
+        self._active = None
+        self._last_query = 0.0
+        # jobs() built from the store: (store, version, cluster, jobs)
+        self._listed = None
+
+    def bind(self, hostname, username):
+        """Switch to a cluster and user, loading any records kept on disk"""
+        if (hostname, username) == (self.hostname, self.username):
+            return
+        self.hostname, self.username = hostname, username
+        self.high_water = None
+        self._jobs = JobStore()
+        self._active = None
+        self._last_query = 0.0
+        if self.cache is not None:
+            stored = self.cache.load_history(hostname, username, self._cutoff())
+            if stored is not None:
+                self.high_water, jobs = stored
+                self._jobs = JobStore(jobs)
+
+    def is_due(self, active_jobs=None):
+        """Return True if sacct may have something new for us.
+
+        ``active_jobs`` is the current squeue result; a job disappearing
+        from it is the usual sign that a new finished record exists.
+        """
+        if active_jobs is None:
+            return True
+        active = {job.job_id for job in active_jobs}
+        departed = self._active is not None and bool(self._active - active)
+        self._active = active
+        return departed or self.is_scheduled()
+
+    def is_scheduled(self):
+        """Return True if a query is due regardless of what squeue shows"""
+        return (self.high_water is None
+                or time.time() - self._last_query >= self.max_query_interval)
+
+    def _cutoff(self):
+        return time.time() - self.retention_days * 86400
+
+    def command(self):
+        """Return the remote command fetching jobs finished since the high-water mark.
+
+        The remote clock is printed first and becomes the next high-water
+        mark, so clock skew between client and cluster does not lose jobs.
+        It is read before sacct runs but only printed if sacct succeeds;
+        otherwise the mark would move past jobs that were never fetched.
+        """
+        # sacct's relative form keeps the first window on the remote clock too
+        start = self.high_water or f"now-{self.retention_days}days"
+        return (f"now=$(date +%Y-%m-%dT%H:%M:%S) && "
+                f"out=$(sacct -X -n -P -u {self.username} -s {SACCT_STATES} "
+                f"-S {start} -E now -o {SACCT_FIELDS}) && "
+                f"printf '%s\\n%s\\n' \"$now\" \"$out\"")
+
+    def apply(self, output, cluster=""):
+        """Merge a query's output. Returns the newly seen finished jobs."""
+        lines = output.split("\n", 1)
+        remote_now = lines[0].strip()
+        if len(remote_now) != 19 or remote_now[10] != "T":
+            # No timestamp: the command did not run; keep the old mark
+            return []
+
+        new_jobs = [job for job in parse_sacct_output(lines[1] if len(lines) > 1 else "", cluster)
+                    if job.job_id not in self._jobs]
+        self._jobs.extend(new_jobs)
+        self.high_water = remote_now
+        self._last_query = time.time()
+
+        # Forget jobs that fell out of the retention window
+        cutoff = self._cutoff()
+        self._jobs.discard_ended_before(cutoff)
+
+        if self.cache is not None:
+            self.cache.save_history(self.hostname, self.username, self.high_water,
+                                    new_jobs, cutoff)
+        return new_jobs
+
+    def jobs(self, cluster=""):
+        """Return the finished jobs, most recently ended first.
+
+        The JobInfo records are only rebuilt when the store has changed.
+        """
+        store = self._jobs
+        listed = self._listed
+        if listed is None or listed[:3] != (store, store.version, cluster):
+            jobs = [store.job(row) for row in store.order_by("ended", reverse=True)]
+            for job in jobs:
+                job.cluster = cluster
+            listed = self._listed = (store, store.version, cluster, jobs)
+        return list(listed[3])
+
+
+def merge_history(active, finished):
+    """Append finished jobs that squeue no longer (or not yet) reports"""
+    # sacct names array tasks 123_4 where squeue has the task's own job id
+    seen = {(job.cluster, job.display_id) for job in active}
+    return active + [job for job in finished if (job.cluster, job.display_id) not in seen]
@@ -0,0 +1,266 @@
+"""Slurm job records and squeue parsing, free of any GUI dependencies."""
+
+import sys
+from dataclasses import dataclass, fields
+from datetime import datetime
+
+# Output format requested from squeue; get_jobs parses exactly these fields.
+# %F/%K identify array tasks. squeue is run without -r so the pending part
+# of an array stays one record with a task range such as ``5-1000%10``.
+SQUEUE_FORMAT = '%A|%j|%T|%M|%D|%C|%m|%L|%F|%K'
+SQUEUE_FIELDS = SQUEUE_FORMAT.count("|") + 1
+
+# Canned squeue output returned in test mode
+TEST_SQUEUE_OUTPUT = """JOBID|NAME|STATE|TIME|NODES|CPUS|MEMORY|TIME_LEFT|ARRAY_JOB_ID|ARRAY_TASK_ID
+12345|tensorflow_train|RUNNING|10:23|2|32|64000|3:49:37|12345|N/A
+12346|data_preprocessing|PENDING|00:00|1|8|16000|1:00:00|12346|N/A
+12347|genome_analysis|RUNNING|5:45|4|128|256000|1-23:54:15|12347|N/A
+12348|pytorch_model|COMPLETED|12:30|8|256|512000|0:00|12348|N/A
+12349|ml_training|PENDING|00:00|2|16|32000|12:00:00|12349|N/A
+12350|batch_process|RUNNING|2:15|1|4|8000|3:45|12350|N/A
+12351|failed_job|FAILED|05:21|2|64|128000|0:00|12351|N/A
+12352|image_processing|RUNNING|8:33|4|96|192000|UNLIMITED|12352|N/A
+12353|awaiting_resources|PENDING|00:00|8|512|1024000|2-00:00:00|12353|N/A
+12360|param_sweep|PENDING|00:00|1|4|8000|2:00:00|12360|4-500%8
+12361|param_sweep|RUNNING|14:02|1|4|8000|1:45:58|12360|1
+12362|param_sweep|RUNNING|9:47|1|4|8000|1:50:13|12360|2
+12363|param_sweep|FAILED|03:10|1|4|8000|0:00|12360|3"""
+
+
+def _slotted(cls):
+    """Rebuild a dataclass with ``__slots__`` (``slots=True`` needs Python 3.10).
+
+    Without a per-instance ``__dict__`` each record is several times smaller,
+    which matters for long job histories.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in names + ("__dict__", "__weakref__")}
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@_slotted
+@dataclass
+class JobInfo:
+    job_id: str
+    name: str
+    status: str
+    time: str
+    nodes: str
+    cpus: str
+    memory: str
+    time_left: str = ""
+    cluster: str = ""
+    end_time: str = ""
+    array_job_id: str = ""
+    array_task_id: str = ""
+
+    @property
+    def key(self) -> str:
+        """Return an identifier that is unique across clusters"""
+        return f"{self.cluster}/{self.job_id}" if self.cluster else self.job_id
+
+    @property
+    def is_array(self) -> bool:
+        """Return True if the record belongs to a job array"""
+        return self.array_task_id not in ("", "N/A")
+
+    @property
+    def task_count(self) -> int:
+        """Return how many tasks the record stands for (a pending range may be many)"""
+        if not self.is_array:
+            return 1
+        return sum(len(tasks) for tasks in task_ranges(self.array_task_id))
+
+    @property
+    def display_id(self) -> str:
+        """Return the id users know the job by, e.g. ``123_4`` or ``123_[5-100%10]``"""
+        if not self.is_array:
+            return self.job_id
+        task = self.array_task_id
+        if self.task_count != 1 and not task.startswith("["):
+            task = f"[{task}]"
+        return f"{self.array_job_id}_{task}"
+
+    @property
+    def ended_at(self) -> float:
+        """Return the end time as a Unix timestamp, or 0.0 if unknown"""
+        try:
+            return datetime.strptime(self.end_time, "%Y-%m-%dT%H:%M:%S").timestamp()
+        except ValueError:
+            return 0.0
+
+    @property
+    def tag(self) -> str:
+        """Return the appropriate tag for the job's status"""
+        if self.status == "RUNNING":
+            return 'running'
+        elif self.status == "PENDING":
+            return 'pending'
+        elif self.status in ["COMPLETED", "COMPLETING"]:
+            return 'completed'
+        elif self.status in FAILED_STATES:
+            return 'failed'
+        return 'pending'  # Default case
+
+    @staticmethod
+    def format_memory(memory: str) -> str:
+        """Format memory string to MB/GB format"""
+        try:
+            if isinstance(memory, str) and ("MB" in memory or "GB" in memory):
+                return memory
+            memory_val = parse_memory_mb(memory)
+            if memory_val is None:
+                return memory
+            return f"{memory_val/1024:.1f}GB" if memory_val >= 1024 else f"{memory_val}MB"
+        except (ValueError, AttributeError):
+            return memory
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "JobInfo":
+        """Build a JobInfo from ``to_dict`` output, ignoring unknown keys"""
+        return cls(**{f.name: data[f.name] for f in fields(cls) if f.name in data})
+
+    def to_dict(self) -> dict:
+        """Return the job as a plain dict, including its status tag"""
+        return {
+            "job_id": self.job_id,
+            "name": self.name,
+            "status": self.status,
+            "time": self.time,
+            "nodes": self.nodes,
+            "cpus": self.cpus,
+            "memory": self.memory,
+            "time_left": self.time_left,
+            "cluster": self.cluster,
+            "end_time": self.end_time,
+            "array_job_id": self.array_job_id,
+            "array_task_id": self.array_task_id,
+            "tag": self.tag,
+        }
+
+
+# Terminal states shown as failed; sacct reports several squeue never shows
+FAILED_STATES = {"FAILED", "TIMEOUT", "CANCELLED", "OUT_OF_MEMORY", "NODE_FAIL",
+                 "PREEMPTED", "BOOT_FAIL", "DEADLINE"}
+
+_MEMORY_UNITS_MB = {"K": 1 / 1024, "M": 1, "G": 1024, "T": 1024 * 1024}
+
+
+def parse_memory_mb(value):
+    """Convert a Slurm memory value such as ``64000``, ``4G`` or ``4000Mn`` to MB.
+
+    Plain numbers are megabytes. sacct's per-node/per-CPU suffixes (``n``,
+    ``c``) are ignored, as is the ``B`` of already formatted values such as
+    ``7.8GB``. Returns None if the value is not a memory size.
+    """
+    value = value.strip().rstrip("ncB")
+    if not value:
+        return None
+    unit = value[-1].upper()
+    if unit in _MEMORY_UNITS_MB:
+        return int(float(value[:-1]) * _MEMORY_UNITS_MB[unit])
+    return int(value)
+
+
+def parse_duration(value):
+    """Convert a Slurm duration such as ``1-02:03:04`` or ``5:45`` to seconds.
+
+    Returns None for values without a duration, e.g. ``UNLIMITED``.
+    """
+    try:
+        days, _, clock = value.strip().rpartition("-")
+        seconds = 0
+        for part in clock.split(":"):
+            seconds = seconds * 60 + int(part)
+        if days:
+            # D-HH and D-HH:MM omit the trailing fields
+            seconds *= 60 ** (2 - clock.count(":"))
+        return seconds + int(days or 0) * 86400
+    except (ValueError, AttributeError):
+        return None
+
+
+def format_duration(seconds):
+    """Format seconds the way squeue does, e.g. ``5:45``, ``3:49:37``, ``1-23:54:15``"""
+    days, rest = divmod(int(seconds), 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if days:
+        return f"{days}-{hours:02d}:{minutes:02d}:{seconds:02d}"
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def task_ranges(spec):
+    """Convert an array task spec such as ``[1-9:2,20%4]`` to a list of ranges.
+
+    The ``%`` throttle is ignored. Malformed parts are skipped.
+    """
+    ranges = []
+    for part in spec.strip("[]").split("%", 1)[0].split(","):
+        try:
+            bounds, _, step = part.partition(":")
+            first, _, last = bounds.partition("-")
+            ranges.append(range(int(first), int(last or first) + 1, int(step or 1)))
+        except ValueError:
+            continue
+    return ranges
+
+
+def parse_squeue_output(squeue_output, cluster=""):
+    """Parse squeue output produced with SQUEUE_FORMAT into JobInfo records.
+
+    Everything between the first field and the last eight is the job name,
+    so names containing ``|`` do not shift the other columns. squeue does
+    not pad ``-o`` fields, so lines are split once and used as they are.
+    """
+    jobs = []
+    append = jobs.append
+    intern = sys.intern
+    # Few distinct memory sizes occur; format each once
+    memory_sizes = {}
+    for line in squeue_output.split("\n"):
+        parts = line.split("|")
+        if len(parts) == SQUEUE_FIELDS:
+            job_id, name, status, runtime, nodes, cpus, memory, time_left, \
+                array_job_id, array_task_id = parts
+        elif len(parts) > SQUEUE_FIELDS:
+            job_id = parts[0]
+            name = "|".join(parts[1:2 - SQUEUE_FIELDS])
+            status, runtime, nodes, cpus, memory, time_left, \
+                array_job_id, array_task_id = parts[2 - SQUEUE_FIELDS:]
+        else:
+            continue
+        if job_id == "JOBID":
+            continue
+
+        formatted = memory_sizes.get(memory)
+        if formatted is None:
+            formatted = memory_sizes[memory] = intern(JobInfo.format_memory(memory))
+        # Values repeated across jobs share one string object
+        append(JobInfo(job_id, intern(name), intern(status), runtime, intern(nodes),
+                       intern(cpus), formatted, time_left, cluster, "",
+                       intern(array_job_id), array_task_id))
+
+    return jobs
+
+
+def diff_jobs(previous, current):
+    """Compare two job lists keyed by JobInfo.key.
+
+    Returns ``(added, changed, removed)`` where ``added`` and ``changed``
+    are lists of JobInfo from ``current`` and ``removed`` is a list of job
+    keys that are no longer present.
+    """
+    before = {job.key: job for job in previous}
+    added, changed = [], []
+    for job in current:
+        old = before.pop(job.key, None)
+        if old is None:
+            added.append(job)
+        elif old != job:
+            changed.append(job)
+    return added, changed, list(before)
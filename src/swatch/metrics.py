@@ -0,0 +1,130 @@
+"""Opt-in Prometheus metrics about SWATCH's own polling.
+
+Started with ``--metrics-port``; serves the text exposition format on
+``http://127.0.0.1:<port>/metrics`` so squeue latency, errors, SSH
+reconnects and job counts can be scraped and alerted on. Only localhost
+is bound, since the job counts are the user's own.
+"""
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds of the poll latency histogram, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+JOB_TAGS = ("running", "pending", "completed", "failed")
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Thread-safe store of the values exposed on /metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = []
+        # Per cluster: bucket counts (last one is +Inf), sum, count
+        self._latency = {}
+        self._errors = {}
+        self._jobs = {}
+        self._last_poll = {}
+
+    def track(self, client):
+        """Start collecting metrics from a SlurmClient"""
+        client.metrics = self
+        with self._lock:
+            if client not in self._clients:
+                self._clients.append(client)
+
+    @staticmethod
+    def cluster_of(client):
+        return client.name or client.hostname
+
+    def observe_poll(self, client, latency, jobs):
+        """Record one squeue call; ``jobs`` is None if it failed"""
+        cluster = self.cluster_of(client)
+        with self._lock:
+            if latency is not None:
+                buckets, total, count = self._latency.get(
+                    cluster, ([0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0))
+                buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+                self._latency[cluster] = (buckets, total + latency, count + 1)
+            if jobs is None:
+                self._errors[cluster] = self._errors.get(cluster, 0) + 1
+                return
+            counts = dict.fromkeys(JOB_TAGS, 0)
+            for job in jobs:
+                counts[job.tag] += job.task_count
+            self._jobs[cluster] = counts
+            self._last_poll[cluster] = time.time()
+
+    def render(self):
+        """Return all metrics in the Prometheus text format"""
+        lines = []
+        with self._lock:
+            lines += ["# HELP swatch_poll_latency_seconds Time taken by squeue, including SSH",
+                      "# TYPE swatch_poll_latency_seconds histogram"]
+            for cluster, (buckets, total, count) in self._latency.items():
+                cumulative = 0
+                for bound, hits in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                    cumulative += hits
+                    lines.append(f'swatch_poll_latency_seconds_bucket{{cluster="{_label(cluster)}",'
+                                 f'le="{bound}"}} {cumulative}')
+                lines.append(f'swatch_poll_latency_seconds_sum{{cluster="{_label(cluster)}"}} {total:.6f}')
+                lines.append(f'swatch_poll_latency_seconds_count{{cluster="{_label(cluster)}"}} {count}')
+
+            lines += ["# HELP swatch_squeue_errors_total squeue calls that failed",
+                      "# TYPE swatch_squeue_errors_total counter"]
+            for cluster, errors in self._errors.items():
+                lines.append(f'swatch_squeue_errors_total{{cluster="{_label(cluster)}"}} {errors}')
+
+            lines += ["# HELP swatch_ssh_reconnects_total SSH sessions re-established after a drop",
+                      "# TYPE swatch_ssh_reconnects_total counter"]
+            for client in self._clients:
+                reconnects = client.session.reconnect_count if client.session else 0
+                lines.append(f'swatch_ssh_reconnects_total{{cluster="{_label(self.cluster_of(client))}"}} '
+                             f'{reconnects}')
+
+            lines += ["# HELP swatch_jobs Jobs (array tasks counted singly) in the last successful poll, by state",
+                      "# TYPE swatch_jobs gauge"]
+            for cluster, counts in self._jobs.items():
+                for tag, count in counts.items():
+                    lines.append(f'swatch_jobs{{cluster="{_label(cluster)}",state="{tag}"}} {count}')
+
+            lines += ["# HELP swatch_last_poll_timestamp_seconds Time of the last successful poll",
+                      "# TYPE swatch_last_poll_timestamp_seconds gauge"]
+            for cluster, stamp in self._last_poll.items():
+                lines.append(f'swatch_last_poll_timestamp_seconds{{cluster="{_label(cluster)}"}} {stamp:.3f}')
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(metrics, port, host="127.0.0.1"):
+    """Serve ``metrics`` on a background thread. Returns the server, or None."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes every few seconds would flood the console
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        print(f"Could not start metrics endpoint on {host}:{port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,127 @@
+"""Long-lived worker threads for the GUI's background work.
+
+Logins, job fetches and detail lookups all run here instead of on a new
+thread each. Tasks wait in a bounded queue, so a stuck cluster cannot pile
+up work. A task submitted with a ``key`` replaces a queued, not yet started
+task with the same key, so only the latest request for something is run.
+``stop()`` drops everything still queued and lets the workers exit once
+their current task returns.
+"""
+
+import queue
+import threading
+
+_STOP = object()
+
+
+class Task:
+    """A queued call that can be cancelled until a worker picks it up"""
+
+    __slots__ = ("func", "args", "key", "on_cancel", "_cancelled")
+
+    def __init__(self, func, args, key=None, on_cancel=None):
+        self.func = func
+        self.args = args
+        self.key = key
+        self.on_cancel = on_cancel
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+
+class BackgroundPoller:
+    """A fixed pool of worker threads fed from a bounded queue"""
+
+    def __init__(self, workers=4, max_pending=64):
+        # Room for one stop marker per worker
+        self._queue = queue.Queue(maxsize=max(max_pending, workers))
+        self._lock = threading.Lock()
+        self._queued = {}
+        self._stopped = False
+        self._threads = []
+        self.grow(workers)
+
+    def grow(self, workers):
+        """Start more workers until there are at least ``workers``; never shrinks"""
+        with self._lock:
+            if self._stopped:
+                return
+            while len(self._threads) < workers:
+                thread = threading.Thread(target=self._work,
+                                          name=f"swatch-poller-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, func, *args, key=None, on_cancel=None):
+        """Queue ``func(*args)``. Returns the Task, or None if stopped or full."""
+        task = Task(func, args, key, on_cancel)
+        with self._lock:
+            if self._stopped:
+                return None
+            try:
+                self._queue.put_nowait(task)
+            except queue.Full:
+                print(f"Background queue full, dropping {key or func.__name__}")
+                return None
+            if key is not None:
+                stale = self._queued.get(key)
+                if stale is not None:
+                    stale.cancel()
+                self._queued[key] = task
+        return task
+
+    def cancel(self, key):
+        """Cancel the queued task for ``key``, if it has not started yet"""
+        with self._lock:
+            task = self._queued.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            if task is _STOP:
+                return
+            with self._lock:
+                if task.key is not None and self._queued.get(task.key) is task:
+                    del self._queued[task.key]
+            if task.cancelled:
+                if task.on_cancel is not None:
+                    task.on_cancel()
+                continue
+            try:
+                task.func(*task.args)
+            except Exception as e:
+                print(f"Background task {task.key or task.func.__name__} failed: {e}")
+
+    def stop(self):
+        """Refuse new tasks, cancel queued ones and let the workers exit"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._queued.clear()
+        while True:
+            try:
+                task = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if task.on_cancel is not None:
+                task.on_cancel()
+        for _ in self._threads:
+            # Never blocks: the queue was just emptied and holds one per worker
+            self._queue.put(_STOP)
+
+    @property
+    def busy(self):
+        """True while any worker thread is still running"""
+        return any(thread.is_alive() for thread in self._threads)
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
@@ -0,0 +1,76 @@
+"""Adaptive refresh scheduling.
+
+Polls quickly while jobs are changing state or about to hit their time
+limit, backs off exponentially while the queue is quiet, and stretches the
+interval further when squeue itself gets slow, since a slow squeue usually
+means a loaded slurmctld.
+"""
+
+from .jobs import parse_duration
+
+
+class AdaptiveScheduler:
+    """Decide how long to wait before the next poll of one cluster.
+
+    Call ``complete()`` with each fetch's result and the time it took, then
+    ask ``next_interval()`` when to poll again. Keeping fetches from
+    overlapping is RefreshCoordinator's job.
+    """
+
+    def __init__(self, min_interval=5, max_interval=600, initial_interval=30,
+                 backoff=2.0, quiet_cycles=2, latency_budget=0.1,
+                 time_limit_window=300):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        # Unchanged polls to wait before backing off
+        self.quiet_cycles = quiet_cycles
+        # Largest fraction of wall time we are willing to spend inside squeue
+        self.latency_budget = latency_budget
+        # Jobs with less than this many seconds left count as "about to end"
+        self.time_limit_window = time_limit_window
+
+        self.interval = initial_interval
+        self.last_latency = 0.0
+        self._states = None
+        self._quiet = 0
+
+    def complete(self, jobs, latency):
+        """Record a finished fetch; ``jobs`` is None if it failed"""
+        self.last_latency = latency
+
+        if jobs is None:
+            # Errors are often a struggling controller; don't hammer it
+            self._slow_down()
+            return
+
+        states = {job.key: job.status for job in jobs}
+        changed = self._states is not None and states != self._states
+        self._states = states
+
+        if changed or self._near_time_limit(jobs):
+            self.interval = self.min_interval
+            self._quiet = 0
+        else:
+            self._quiet += 1
+            if self._quiet >= self.quiet_cycles:
+                self._slow_down()
+
+    def next_interval(self):
+        """Return the number of seconds to wait before the next poll"""
+        # Keep squeue's share of wall time within budget when it is slow
+        floor = self.last_latency / self.latency_budget if self.latency_budget else 0
+        return min(self.max_interval, max(self.min_interval, self.interval, floor))
+
+    def _slow_down(self):
+        self.interval = min(self.max_interval, self.interval * self.backoff)
+
+    def _near_time_limit(self, jobs):
+        # Poll faster to catch the transition as a job runs out of time
+        window = max(self.time_limit_window, self.interval)
+        for job in jobs:
+            if job.status == "RUNNING":
+                left = parse_duration(job.time_left)
+                if left is not None and left <= window:
+                    return True
+        return False
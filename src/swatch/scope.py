@@ -0,0 +1,100 @@
+"""Which jobs to list: the user's own, everyone's, an account's or a partition's.
+
+Filtering is left to squeue (``-u``/``-A``/``-p``/``-t``) so only matching
+rows cross the network. A site-wide queue can be hundreds of thousands of
+jobs, so every scope other than the user's own is fetched a page at a
+time: squeue sorts by job id on the controller, and awk on the login node
+passes on only the requested page plus a ``#total`` line.
+"""
+
+import shlex
+
+KINDS = ("user", "all", "account", "partition")
+DEFAULT_PAGE_SIZE = 5000
+TOTAL_MARKER = "#total "
+
+
+class Scope:
+    """A squeue filter plus the page of its result being shown"""
+
+    def __init__(self, kind="user", value="", states="", page_size=DEFAULT_PAGE_SIZE):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown scope {kind!r}; expected one of {', '.join(KINDS)}")
+        if kind in ("account", "partition") and not value:
+            raise ValueError(f"The {kind} scope needs a name, e.g. {kind}:NAME")
+        self.kind = kind
+        self.value = value
+        # Comma-separated squeue states, e.g. "R,PD"; empty means all
+        self.states = states
+        self.page_size = page_size
+        self.page = 0
+
+    @classmethod
+    def parse(cls, text, states="", page_size=DEFAULT_PAGE_SIZE):
+        """Build a scope from ``user``, ``all``, ``account:NAME`` or ``partition:NAME``"""
+        kind, _, value = (text or "user").strip().partition(":")
+        return cls(kind.strip().lower(), value.strip(), (states or "").replace(" ", "").upper(),
+                   page_size)
+
+    def __str__(self):
+        return f"{self.kind}:{self.value}" if self.value else self.kind
+
+    def __eq__(self, other):
+        return (isinstance(other, Scope)
+                and (self.kind, self.value, self.states) == (other.kind, other.value, other.states))
+
+    def __hash__(self):
+        return hash((self.kind, self.value, self.states))
+
+    @property
+    def paged(self):
+        return self.kind != "user"
+
+    def squeue_args(self, username):
+        """Return the squeue options selecting this scope's jobs"""
+        if self.kind == "user":
+            args = f"-u {shlex.quote(username)}"
+        elif self.kind == "account":
+            args = f"-A {shlex.quote(self.value)}"
+        elif self.kind == "partition":
+            args = f"-p {shlex.quote(self.value)}"
+        else:
+            args = "--all"
+        if self.states:
+            args += f" -t {shlex.quote(self.states)}"
+        if self.paged:
+            # A stable order keeps pages from overlapping between polls
+            args += " -S i"
+        return args
+
+    def paginate(self, squeue_command, total=True):
+        """Wrap a headerless squeue command so it only prints the current page.
+
+        With ``total``, a final ``#total N`` line gives the full match count.
+        squeue's own exit status is kept if it fails.
+        """
+        first = self.page * self.page_size
+        program = f"NF && ++n > {first} && n <= {first + self.page_size}"
+        if total:
+            program += f'; END {{ print "{TOTAL_MARKER}" n + 0 }}'
+        return f"out=$({squeue_command}) && printf '%s\\n' \"$out\" | awk {shlex.quote(program)}"
+
+    def describe(self, shown, total):
+        """Return e.g. ``"5,001-10,000 of 183,422"`` for a fetched page"""
+        if total is None:
+            return f"{shown:,} jobs"
+        if not shown:
+            return f"0 of {total:,}"
+        first = self.page * self.page_size + 1
+        return f"{first:,}-{first + shown - 1:,} of {total:,}"
+
+
+def parse_total(output):
+    """Return the count from a paged command's ``#total`` line, or None"""
+    tail = output.rstrip("\n").rsplit("\n", 1)[-1]
+    if tail.startswith(TOTAL_MARKER):
+        try:
+            return int(tail[len(TOTAL_MARKER):])
+        except ValueError:
+            return None
+    return None
@@ -1,18 +1,36 @@
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
-import subprocess
-import threading
 import time
-import re
 from datetime import datetime
 import os
 import json
-import getpass
-import paramiko
-from PIL import Image, ImageTk, ImageDraw, ImageFont
-import argparse
-from dataclasses import dataclass
 import queue
+import importlib.util
+
+from .arrays import JobArray, group_arrays
+from .cache import SnapshotCache, describe_age
+from .client import CONFIG_FILE, SlurmClient, load_config
+from .clusters import connect_all, load_cluster_clients
+from .coordinator import RefreshCoordinator
+from .details import DetailCache, format_details
+from .history import merge_history
+from .poller import BackgroundPoller
+from .scheduler import AdaptiveScheduler
+from .scope import Scope
+from .streaming import JobStream
+from .synthetic import SyntheticCluster
+from .tail import LogTail
+from .timing import RefreshTiming, timing_logger
+from .usage import UsageSampler
+from .jobs import JobInfo
+
+# Virtual event background threads raise when a result is waiting
+RESULT_EVENT = "<<RefreshResult>>"
+# Seconds to let running background tasks finish when the window closes
+CLOSE_TIMEOUT = 2.0
+# Starting points offered by the scope box; names are typed after the colon
+SCOPE_CHOICES = ("user", "all", "account:", "partition:")
+STATE_CHOICES = ("", "R", "PD", "R,PD")
 
 # Define a custom style theme class
 class DarkTheme:
@@ -46,18 +64,22 @@ class DarkTheme:
     # Updated spacing
     PADDING = 10  # Consistent macOS padding
     CORNER_RADIUS = 12  # Larger radius for smoother corners
+    ROW_HEIGHT = 24  # Slightly taller rows for macOS look
     
     # Treeview configuration
     TREEVIEW_CONFIG = {
-        "columns": ("job_id", "name", "status", "time", "nodes", "cpus", "memory"),
+        "columns": ("cluster", "job_id", "name", "status", "time", "nodes", "cpus", "memory",
+                    "usage"),
         "widths": {
+            "cluster": 90,
             "job_id": 80,
             "name": 150,
             "status": 80,
             "time": 80,
             "nodes": 60,
             "cpus": 60,
-            "memory": 90
+            "memory": 90,
+            "usage": 250
         }
     }
 
@@ -103,6 +125,8 @@ class RoundedFrame(tk.Canvas):
 # Create status indicator circle
 def create_circle_image(color, size=12):
     """Create a colored circle image for status indicators"""
+    # Pillow is imported on first use to keep it off the startup path
+    from PIL import Image, ImageTk, ImageDraw
     image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
     draw = ImageDraw.Draw(image)
     draw.ellipse((0, 0, size, size), fill=color)
@@ -119,7 +143,7 @@ class CustomTreeview(ttk.Treeview):
             foreground=DarkTheme.TEXT_COLOR,
             fieldbackground=DarkTheme.SECONDARY_BG,
             borderwidth=0,
-            rowheight=24  # Slightly taller for macOS look
+            rowheight=DarkTheme.ROW_HEIGHT
         )
         
         # Configure header
@@ -141,6 +165,167 @@ class CustomTreeview(ttk.Treeview):
         
         kwargs['style'] = "Custom.Treeview"
         super().__init__(master, **kwargs)
+        
+        # Last values/tag written for each row, keyed by iid
+        self._rows = {}
+    
+    def sync_rows(self, rows):
+        """Reconcile the tree with ``rows``, an iterable of (iid, values, tag).
+        
+        Only new rows are inserted, departed rows deleted and changed rows
+        updated, so selection and scroll position survive a refresh and the
+        cost scales with churn rather than with the number of rows.
+        """
+        incoming = {}
+        for iid, values, tag in rows:
+            incoming[iid] = (tuple(values), tag)
+        
+        departed = [iid for iid in self._rows if iid not in incoming]
+        if departed:
+            self.delete(*departed)
+            for iid in departed:
+                del self._rows[iid]
+        
+        for index, (iid, row) in enumerate(incoming.items()):
+            current = self._rows.get(iid)
+            if current is None:
+                # Insert at its position so rows entering above stay on top
+                self.insert("", index, iid=iid, values=row[0], tags=(row[1],))
+            elif current != row:
+                self.item(iid, values=row[0], tags=(row[1],))
+            self._rows[iid] = row
+        
+        # Existing rows change places too, e.g. when squeue re-sorts a job
+        # that started running, so check the order even without inserts
+        order = list(incoming)
+        if list(self.get_children()) != order:
+            for index, iid in enumerate(order):
+                self.move(iid, "", index)
+        
+        return len(incoming)
+
+class VirtualJobTable:
+    """Show a large row list through a Treeview that holds only visible rows.
+    
+    The full list stays in Python; only the rows in view plus a small
+    overscan exist as Tk items, so memory and layout cost stay flat no
+    matter how many jobs there are. Scrolling re-materializes the window
+    through ``CustomTreeview.sync_rows``, so a one-row scroll costs one
+    insert and one delete.
+    """
+    
+    def __init__(self, tree, scrollbar, overscan=5):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.overscan = overscan
+        
+        self.rows = []
+        self.offset = 0
+        self._positions = None
+        # Selected iids, including rows currently scrolled out of view
+        self.selected = set()
+        
+        scrollbar.configure(command=self.yview)
+        tree.bind("<Configure>", lambda event: self._materialize())
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tree.bind(sequence, self._on_wheel)
+        for sequence, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"),
+                               ("<Next>", "page"), ("<Home>", "home"), ("<End>", "end")):
+            tree.bind(sequence, lambda event, step=step: self._on_key(step))
+        tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+    
+    def visible_count(self):
+        """Return how many rows fit in the tree (minus the heading)"""
+        return max(1, self.tree.winfo_height() // DarkTheme.ROW_HEIGHT - 1)
+    
+    def set_rows(self, rows):
+        """Replace the full row list, an iterable of (iid, values, tag)"""
+        self.rows = rows if isinstance(rows, list) else list(rows)
+        self._positions = None
+        self._materialize()
+    
+    def scroll_to(self, offset):
+        """Make ``offset`` the first visible row"""
+        offset = max(0, min(int(offset), len(self.rows) - self.visible_count()))
+        if offset != self.offset:
+            self.offset = offset
+            self._materialize()
+    
+    def yview(self, *args):
+        """Scrollbar command: ``moveto fraction`` or ``scroll n units|pages``"""
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.visible_count() if args[2] == "pages" else 1)
+            self.scroll_to(self.offset + step)
+    
+    def _materialize(self):
+        count = self.visible_count()
+        total = len(self.rows)
+        self.offset = max(0, min(self.offset, total - count))
+        self.tree.sync_rows(self.rows[self.offset:self.offset + count + self.overscan])
+        # The overscan rows must not let Tk scroll the tree on its own
+        self.tree.yview_moveto(0)
+        
+        visible = [iid for iid in self.selected if iid in self.tree._rows]
+        if set(visible) != set(self.tree.selection()):
+            self.tree.selection_set(visible)
+        
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + count) / total))
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def _on_wheel(self, event):
+        if event.num == 4:
+            step = -3
+        elif event.num == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        self.scroll_to(self.offset + step)
+        return "break"
+    
+    def _on_select(self, event):
+        # Selections of rows out of view are kept, rows in view are replaced
+        in_view = set(self.tree._rows)
+        self.selected = (self.selected - in_view) | set(self.tree.selection())
+    
+    def _position(self, iid):
+        if self._positions is None:
+            self._positions = {row[0]: index for index, row in enumerate(self.rows)}
+        return self._positions.get(iid)
+    
+    def _on_key(self, step):
+        if not self.rows:
+            return "break"
+        current = self._position(self.tree.focus())
+        page = self.visible_count()
+        if current is None:
+            current = self.offset
+        if step == "home":
+            target = 0
+        elif step == "end":
+            target = len(self.rows) - 1
+        elif step == "page":
+            target = current + page
+        elif step == "-page":
+            target = current - page
+        else:
+            target = current + step
+        target = max(0, min(target, len(self.rows) - 1))
+        
+        # Scroll just enough to bring the target row into view
+        if target < self.offset:
+            self.scroll_to(target)
+        elif target >= self.offset + page:
+            self.scroll_to(target - page + 1)
+        
+        iid = self.rows[target][0]
+        self.selected = {iid}
+        self.tree.selection_set(iid)
+        self.tree.focus(iid)
+        return "break"
 
 class CustomStyle(ttk.Style):
     def __init__(self):
@@ -238,6 +423,7 @@ class LoginDialog(simpledialog.Dialog):
 # Create a colored title logo
 def create_swatch_logo():
     """Create a colored swatch logo with each letter corresponding to job status"""
+    from PIL import Image, ImageTk, ImageDraw, ImageFont
     # Define dimensions
     font_size = 24
     padding = 5
@@ -281,42 +467,105 @@ def create_swatch_logo():
         print(f"Error creating logo: {e}")
         return None
 
-@dataclass
-class JobInfo:
-    job_id: str
-    name: str
-    status: str
-    time: str
-    nodes: str
-    cpus: str
-    memory: str
-
-    @property
-    def tag(self) -> str:
-        """Return the appropriate tag for the job's status"""
-        if self.status == "RUNNING":
-            return 'running'
-        elif self.status == "PENDING":
-            return 'pending'
-        elif self.status in ["COMPLETED", "COMPLETING"]:
-            return 'completed'
-        elif self.status in ["FAILED", "TIMEOUT", "CANCELLED"]:
-            return 'failed'
-        return 'pending'  # Default case
-
-    @staticmethod
-    def format_memory(memory: str) -> str:
-        """Format memory string to MB/GB format"""
+class LogTailWindow:
+    """Window following a job's output file as it grows.
+    
+    Each tick reads only the bytes appended since the last one (see
+    LogTail), on the shared background poller; the text widget keeps no
+    more lines than the tail's ring buffer.
+    """
+    
+    def __init__(self, root, poller, client, title, path, interval=2000, on_close=None):
+        self.root = root
+        self.poller = poller
+        self.interval = interval
+        self.on_close = on_close
+        self.tail = LogTail(client.read_remote_file, path)
+        self.closed = False
+        self._busy = False
+        self._timer = None
+        
+        self.window = tk.Toplevel(root)
+        self.window.title(f"{title}: {path}")
+        self.window.configure(bg=DarkTheme.BG_COLOR)
+        self.window.geometry("760x420")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        self.status = ttk.Label(self.window, text="Connecting...",
+                              background=DarkTheme.BG_COLOR,
+                              font=DarkTheme.SMALL_FONT)
+        self.status.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=2)
+        scrollbar = ttk.Scrollbar(self.window, orient=tk.VERTICAL,
+                                  style="Custom.Vertical.TScrollbar")
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text = tk.Text(self.window, wrap=tk.CHAR, bg=DarkTheme.BG_COLOR,
+                            fg=DarkTheme.TEXT_COLOR, font=("Menlo", 10), relief=tk.FLAT,
+                            highlightthickness=0, yscrollcommand=scrollbar.set,
+                            state="disabled")
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.configure(command=self.text.yview)
+        
+        self._tick()
+    
+    def _tick(self):
+        if self.closed:
+            return
+        # Never queue a read while the previous one is still running
+        if not self._busy:
+            self._busy = True
+            task = self.poller.submit(self._read, key=("tail", self.tail.path),
+                                      on_cancel=self._cancelled)
+            if task is None:
+                self._busy = False
+        self._timer = self.window.after(self.interval, self._tick)
+    
+    def _cancelled(self):
+        self._busy = False
+    
+    def _read(self):
+        """Fetch the appended bytes off the UI thread"""
         try:
-            if isinstance(memory, str) and ("MB" in memory or "GB" in memory):
-                return memory
-            memory_val = int(memory.strip())
-            return f"{memory_val/1024:.1f}GB" if memory_val >= 1024 else f"{memory_val}MB"
-        except (ValueError, AttributeError):
-            return memory
+            try:
+                lines = self.tail.poll()
+            except Exception as e:
+                # e.g. an SFTP error mid-read; the next tick tries again
+                print(f"Error reading {self.tail.path}: {e}")
+                lines = None
+            self.root.after(0, lambda: self._show(lines))
+        finally:
+            # Whatever happened, let the next tick read again
+            self._busy = False
+    
+    def _show(self, lines):
+        if self.closed:
+            return
+        if lines is None:
+            self.status.config(text=f"Cannot read {self.tail.path}")
+            return
+        self.status.config(text=f"{self.tail.offset:,} bytes · updated {datetime.now():%H:%M:%S}")
+        if not lines:
+            return
+        
+        follow = self.text.yview()[1] >= 0.999
+        self.text.config(state="normal")
+        self.text.insert(tk.END, "\n".join(lines) + "\n")
+        excess = int(self.text.index("end-1c").split(".")[0]) - 1 - self.tail.lines.maxlen
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+        self.text.config(state="disabled")
+        if follow:
+            self.text.see(tk.END)
+    
+    def close(self):
+        self.closed = True
+        if self._timer:
+            self.window.after_cancel(self._timer)
+        self.window.destroy()
+        if self.on_close:
+            self.on_close()
 
 class HPCJobMonitor:
-    def __init__(self, root, test_mode=False):
+    def __init__(self, root, test_mode=False, simulator=None, metrics=None):
         self.root = root
         self.root.geometry("800x550")  # Slightly increased height for legend
         self.root.configure(bg=DarkTheme.BG_COLOR)
@@ -329,8 +578,9 @@ class HPCJobMonitor:
         
         # Initialize auto-refresh variables first
         self.auto_refresh = tk.BooleanVar(value=True)
-        self.refresh_interval = 30  # seconds
+        self.refresh_interval = None  # seconds; None means adaptive
         self.refresh_intervals = {
+            "Adaptive": None,
             "5 seconds": 5,
             "30 seconds": 30,
             "1 minute": 60,
@@ -338,23 +588,84 @@ class HPCJobMonitor:
             "15 minutes": 900,
             "1 hour": 3600
         }
-        self.refresh_interval_var = tk.StringVar(value="30 seconds")
-        self.refresh_timer = None
-        
-        # Authentication
-        self.username = ""
-        self.password = ""
-        self.hostname = ""
-        self.authenticated = False
-        self.ssh_client = None
-        
-        # Add thread safety and result queue
-        self.ssh_lock = threading.Lock()
+        self.refresh_interval_var = tk.StringVar(value="Adaptive")
+        # One timer and adaptive scheduler per cluster, keyed by its SlurmClient
+        self.refresh_timers = {}
+        self.schedulers = {}
+        # At most one fetch per cluster; orders results so stale ones are dropped
+        self.refreshes = RefreshCoordinator()
+        
+        # Optional push mode: one JobStream per cluster replaces its timer
+        self.stream_mode = tk.BooleanVar(value=False)
+        self.streams = {}
+        
+        # Merge finished jobs from sacct into the view
+        self.show_history = tk.BooleanVar(value=True)
+        
+        # Where each refresh spends its time: rotating log, optional overlay
+        self.timing_log = timing_logger()
+        self.show_timings = tk.BooleanVar(value=False)
+        
+        # Which jobs squeue lists, shared by every cluster (see Scope)
+        self.scope = Scope()
+        self.scope_var = tk.StringVar(value=str(self.scope))
+        self.states_var = tk.StringVar(value="")
+        
+        # scontrol details per (client, job id), and whose are on show
+        self.details = DetailCache()
+        self.detail_key = None
+        self.detail_stdout = None
+        # Job whose panel the user closed; re-renders select it again
+        self.detail_closed = None
+        # Open output tails by file path
+        self.tails = {}
+        
+        # Live usage of running jobs, sampled by sstat after each refresh;
+        # clusters whose sstat call is still running
+        self.show_usage = tk.BooleanVar(value=True)
+        self.usage = {}
+        self.sampling = set()
+        
+        # One row per job array; keys of the arrays whose tasks are shown
+        self.group_arrays = tk.BooleanVar(value=True)
+        self.expanded_arrays = set()
+        
+        # Last snapshot per cluster on disk, for warm starts and offline use.
+        # Test mode never touches it so sample data can't overwrite real jobs.
+        self.cache = None if test_mode else SnapshotCache()
+        
+        # Authentication and job fetching
+        self.client = SlurmClient(
+            test_mode=test_mode,
+            cache=self.cache,
+            simulator=simulator,
+            on_connection_lost=lambda: self.root.after(0, lambda: self.update_login_status(False))
+        )
+        self.client.scope = self.scope
+        
+        # Optional Metrics served to Prometheus; every client reports to it
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.track(self.client)
+        
+        # Additional clusters from the config, and the latest jobs per cluster
+        self.extra_clients = []
+        self.cluster_jobs = {}
+        # When each cluster's jobs were fetched, and which are cached/offline
+        self.cluster_updated = {}
+        self.stale_clusters = set()
+        
+        # Result queue for background fetches; workers wake the Tk loop with
+        # a virtual event as soon as they put something on it
         self.result_queue = queue.Queue()
+        self.root.bind(RESULT_EVENT, lambda event: self._check_refresh_result())
+        # Worker threads shared by logins, stream opens, lookups and tails
+        self.poller = BackgroundPoller()
+        # Job fetches get their own workers, one per cluster, so a cluster
+        # whose squeue hangs never delays the others or the rest of the UI
+        self.fetchers = BackgroundPoller(workers=1)
         
-        # Load saved credentials
-        self.config_file = os.path.join(os.path.expanduser("~"), ".hpcjobmonitor", "config.json")
-        self._load_credentials_async()
+        self.config_file = CONFIG_FILE
         
         # Configure scrollbar style
         scrollbar_style = ttk.Style()
@@ -367,6 +678,10 @@ class HPCJobMonitor:
         # Build GUI
         self.setup_gui()
         
+        # Load saved credentials; connecting happens in the background so
+        # the window is painted before any SSH handshake starts
+        self._load_credentials_async()
+        
         # Start auto-refresh after GUI is built
         self.start_auto_refresh()
     
@@ -389,6 +704,12 @@ class HPCJobMonitor:
                                     font=DarkTheme.MAIN_FONT)
         self.last_updated.pack(side=tk.RIGHT, padx=5)
         
+        # Packed by toggle_timings, to the left of last_updated
+        self.timing_label = ttk.Label(header_frame, text="",
+                                    background=DarkTheme.SECONDARY_BG,
+                                    foreground=DarkTheme.ACCENT_COLOR,
+                                    font=DarkTheme.MAIN_FONT)
+        
         # Add legend above the job tree
         legend_frame = tk.Frame(self.main_frame, bg=DarkTheme.SECONDARY_BG)
         legend_frame.pack(fill=tk.X, pady=5)
@@ -420,12 +741,48 @@ class HPCJobMonitor:
                     foreground=color,
                     font=DarkTheme.MAIN_FONT).pack(side=tk.LEFT, padx=5)
         
-        # Job tree
-        self.tree = CustomTreeview(self.main_frame, 
-                               columns=("job_id", "name", "status", "time", "nodes", "cpus", "memory"),
+        # Job tree; only the rows in view are real Tk items
+        self.table_frame = table_frame = tk.Frame(self.main_frame, bg=DarkTheme.SECONDARY_BG)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.tree = CustomTreeview(table_frame, 
+                               columns=DarkTheme.TREEVIEW_CONFIG["columns"],
                                show="headings", height=15)
         self.init_tree_columns()
-        self.tree.pack(fill=tk.BOTH, expand=True)
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL,
+                                  style="Custom.Vertical.TScrollbar")
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.table = VirtualJobTable(self.tree, scrollbar)
+        # Expand or collapse a job array
+        self.tree.bind("<Double-1>", self._toggle_array)
+        self.tree.bind("<Return>", self._toggle_array)
+        self.tree.bind("<<TreeviewSelect>>", self._on_job_selected, add="+")
+        
+        # Detail panel for the selected job; packed below the table on demand
+        self.detail_frame = tk.Frame(self.main_frame, bg=DarkTheme.SECONDARY_BG)
+        detail_header = tk.Frame(self.detail_frame, bg=DarkTheme.SECONDARY_BG)
+        detail_header.pack(fill=tk.X)
+        self.detail_title = ttk.Label(detail_header, text="",
+                                    background=DarkTheme.SECONDARY_BG,
+                                    font=DarkTheme.MAIN_FONT)
+        self.detail_title.pack(side=tk.LEFT, padx=5)
+        ttk.Button(detail_header, text="✕", width=2,
+                   command=self.hide_details).pack(side=tk.RIGHT, padx=5)
+        self.tail_btn = ttk.Button(detail_header, text="Tail output",
+                                   command=self.tail_output, state="disabled")
+        self.tail_btn.pack(side=tk.RIGHT, padx=5)
+        self.detail_text = tk.Text(self.detail_frame, height=8, wrap=tk.WORD,
+                                   bg=DarkTheme.BG_COLOR, fg=DarkTheme.TEXT_COLOR,
+                                   font=DarkTheme.MAIN_FONT, relief=tk.FLAT,
+                                   highlightthickness=0, state="disabled")
+        self.detail_text.pack(fill=tk.X, padx=5, pady=(2, 0))
+        
+        # Create tags for different status colors
+        self.tree.tag_configure('running', foreground=DarkTheme.RUNNING_COLOR)
+        self.tree.tag_configure('pending', foreground=DarkTheme.PENDING_COLOR)
+        self.tree.tag_configure('completed', foreground=DarkTheme.COMPLETED_COLOR)
+        self.tree.tag_configure('failed', foreground=DarkTheme.FAILED_COLOR)
         
         # Control frame
         control_frame = tk.Frame(self.main_frame, bg=DarkTheme.SECONDARY_BG)
@@ -454,47 +811,180 @@ class HPCJobMonitor:
                                       state="readonly")
         refresh_dropdown.pack(side=tk.LEFT)
         refresh_dropdown.bind("<<ComboboxSelected>>", self.update_refresh_interval)
+        
+        # Push mode: one long-running remote watcher instead of polling
+        ttk.Checkbutton(auto_refresh_frame, text="Push updates", variable=self.stream_mode,
+                       command=self.toggle_auto_refresh).pack(side=tk.LEFT, padx=(10, 0))
+        
+        ttk.Checkbutton(auto_refresh_frame, text="Finished jobs", variable=self.show_history,
+                       command=self.toggle_history).pack(side=tk.LEFT, padx=(10, 0))
+        
+        ttk.Checkbutton(auto_refresh_frame, text="Group arrays", variable=self.group_arrays,
+                       command=self._render_jobs).pack(side=tk.LEFT, padx=(10, 0))
+        
+        ttk.Checkbutton(auto_refresh_frame, text="Usage", variable=self.show_usage,
+                       command=self.toggle_usage).pack(side=tk.LEFT, padx=(10, 0))
+        
+        ttk.Checkbutton(auto_refresh_frame, text="Timings", variable=self.show_timings,
+                       command=self.toggle_timings).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Scope: whose jobs to list, filtered by squeue and paged when large
+        scope_frame = tk.Frame(self.main_frame, bg=DarkTheme.SECONDARY_BG)
+        scope_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(scope_frame, text="Show:", 
+                background=DarkTheme.SECONDARY_BG,
+                font=DarkTheme.MAIN_FONT).pack(side=tk.LEFT, padx=5)
+        scope_box = ttk.Combobox(scope_frame, textvariable=self.scope_var,
+                                 values=SCOPE_CHOICES, width=20)
+        scope_box.pack(side=tk.LEFT)
+        
+        ttk.Label(scope_frame, text="States:", 
+                background=DarkTheme.SECONDARY_BG,
+                font=DarkTheme.MAIN_FONT).pack(side=tk.LEFT, padx=(10, 2))
+        states_box = ttk.Combobox(scope_frame, textvariable=self.states_var,
+                                  values=STATE_CHOICES, width=8)
+        states_box.pack(side=tk.LEFT)
+        for box in (scope_box, states_box):
+            box.bind("<<ComboboxSelected>>",
+                     lambda event: self._on_scope_selected(scope_box))
+            box.bind("<Return>", self.apply_scope)
+        
+        self.next_page_btn = ttk.Button(scope_frame, text="▶", width=2,
+                                        command=lambda: self.change_page(1))
+        self.next_page_btn.pack(side=tk.RIGHT, padx=(2, 5))
+        self.page_label = ttk.Label(scope_frame, text="",
+                                  background=DarkTheme.SECONDARY_BG,
+                                  font=DarkTheme.MAIN_FONT)
+        self.page_label.pack(side=tk.RIGHT, padx=5)
+        self.prev_page_btn = ttk.Button(scope_frame, text="◀", width=2,
+                                        command=lambda: self.change_page(-1))
+        self.prev_page_btn.pack(side=tk.RIGHT, padx=2)
+        self.update_page_controls()
     
     def init_tree_columns(self):
         """Initialize tree columns and headings"""
         # Configure all columns
         columns_config = {
+            "cluster": {"width": 90, "text": "CLUSTER", "anchor": "w"},
             "job_id": {"width": 80, "text": "JOB ID", "anchor": "center"},
             "name": {"width": 150, "text": "NAME", "anchor": "w"},
             "status": {"width": 90, "text": "STATUS", "anchor": "center"},
             "time": {"width": 80, "text": "RUNTIME", "anchor": "center"},
             "nodes": {"width": 60, "text": "NODES", "anchor": "center"},
             "cpus": {"width": 60, "text": "CPUS", "anchor": "center"},
-            "memory": {"width": 90, "text": "MEMORY", "anchor": "center"}
+            "memory": {"width": 90, "text": "MEMORY", "anchor": "center"},
+            "usage": {"width": 250, "text": "USAGE", "anchor": "w"}
         }
         
         # Apply configuration for each column
         for col, config in columns_config.items():
             self.tree.heading(col, text=config["text"])
             self.tree.column(col, width=config["width"], anchor=config["anchor"])
+        
+        self.update_cluster_column()
+    
+    def update_cluster_column(self):
+        """Only show the cluster column when more than one cluster is watched"""
+        columns = DarkTheme.TREEVIEW_CONFIG["columns"]
+        multi = self.extra_clients or len(self.cluster_jobs) > 1
+        self.tree.configure(displaycolumns=columns if multi else columns[1:])
 
     def _load_credentials_async(self):
-        """Asynchronously load and test credentials"""
+        """Load saved credentials and connect with them in the background"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    
-                    if 'username' in config and 'hostname' in config:
-                        self.username = config.get('username', '')
-                        self.hostname = config.get('hostname', 'login.cluster.edu')
-                        
-                        # If password is saved
-                        if 'password' in config:
-                            self.password = config.get('password', '')
-                            
-                            # Test connection with saved credentials
-                            if self.test_connection():
-                                self.authenticated = True
-                                # Update UI in main thread
-                                self.root.after(0, lambda: self.update_login_status(True))
+            config = load_config(self.config_file)
+            
+            if 'scope' in config or 'scope_states' in config:
+                try:
+                    self._set_scope(Scope.parse(config.get('scope', 'user'),
+                                                config.get('scope_states', '')))
+                except ValueError as e:
+                    print(f"Ignoring saved scope: {e}")
+            
+            if 'username' in config and 'hostname' in config:
+                self.client.username = config.get('username', '')
+                self.client.hostname = config.get('hostname', 'login.cluster.edu')
+                self.client.output_format = config.get('squeue_format', 'text')
+                
+                # Show the previous session's jobs right away
+                self._show_cached_jobs(self.client)
+                
+                # If password is saved
+                if 'password' in config:
+                    self.client.password = config.get('password', '')
+                    self.user_label.config(text=f"Connecting to {self.client.hostname}...")
+                    self.poller.submit(self._connect_saved_login, key=("login", self.client))
+            
+            self._load_extra_clusters(config)
         except Exception as e:
             print(f"Error loading credentials: {e}")
+    
+    def _connect_saved_login(self):
+        """Test saved credentials off the UI thread and report back"""
+        try:
+            connected = self.test_connection()
+        except Exception as e:
+            print(f"Error connecting with saved credentials: {e}")
+            connected = False
+        self.root.after(0, lambda: self._on_saved_login(connected))
+    
+    def _on_saved_login(self, connected):
+        if connected:
+            self.client.authenticated = True
+            self.update_login_status(True)
+            self.refresh_jobs()
+        else:
+            self.update_login_status(False)
+            self.user_label.config(text="Saved login failed - please log in")
+    
+    def _load_extra_clusters(self, config):
+        """Connect to the additional clusters listed in the config"""
+        clients = load_cluster_clients(config, test_mode=self.test_mode, cache=self.cache,
+                                       simulator=self.client.simulator)
+        if not clients:
+            return
+        
+        # Jobs from the saved login are tagged too once clusters are mixed
+        self.client.name = config.get('name') or self.client.hostname
+        for client in clients:
+            client.on_connection_lost = (
+                lambda client=client: self.root.after(0, lambda: self._on_cluster_lost(client)))
+            client.scope = self.scope
+            self._show_cached_jobs(client)
+        
+        def connect():
+            connected = connect_all(clients)
+            self.root.after(0, lambda: self._on_clusters_connected(connected))
+        
+        self.poller.submit(connect, key="connect-clusters")
+    
+    def _on_clusters_connected(self, clients):
+        """Start polling additional clusters once they are connected"""
+        self.extra_clients = clients
+        self.update_cluster_column()
+        for client in clients:
+            print(f"Connected to cluster {client.name}")
+            if self.metrics is not None:
+                self.metrics.track(client)
+            self.refresh_jobs(client)
+        if self.auto_refresh.get():
+            self.start_auto_refresh()
+    
+    def _on_cluster_lost(self, client):
+        """Stop polling an additional cluster whose connection dropped"""
+        print(f"Lost connection to cluster {client.name}")
+        self._cancel_timer(client)
+        if client in self.extra_clients:
+            self.extra_clients.remove(client)
+        # Keep showing its last jobs, flagged as offline
+        if client in self.cluster_jobs:
+            self.stale_clusters.add(client)
+            self.update_staleness()
+    
+    def active_clients(self):
+        """Return every authenticated cluster client"""
+        return [client for client in [self.client] + self.extra_clients if client.authenticated]
 
     def handle_login(self):
         """Handle login button click - show dialog and process login"""
@@ -525,7 +1015,7 @@ class HPCJobMonitor:
             row=0, column=0, sticky=tk.W, pady=5, padx=5)
         username_entry = ttk.Entry(content_frame, width=25)
         username_entry.grid(row=0, column=1, pady=5, padx=5)
-        username_entry.insert(0, self.username)
+        username_entry.insert(0, self.client.username)
         
         # Password
         ttk.Label(content_frame, text="Password:", background=DarkTheme.SECONDARY_BG).grid(
@@ -538,7 +1028,7 @@ class HPCJobMonitor:
             row=2, column=0, sticky=tk.W, pady=5, padx=5)
         hostname_entry = ttk.Entry(content_frame, width=25)
         hostname_entry.grid(row=2, column=1, pady=5, padx=5)
-        hostname_entry.insert(0, self.hostname)
+        hostname_entry.insert(0, self.client.hostname)
         
         # Remember credentials
         save_credentials = tk.BooleanVar(value=False)
@@ -576,14 +1066,14 @@ class HPCJobMonitor:
             def process_login():
                 try:
                     # Disconnect existing connection if any
-                    if self.authenticated:
+                    if self.client.authenticated:
                         self.disconnect()
-                        self.authenticated = False
+                        self.client.authenticated = False
                     
                     # Update credentials
-                    self.username = username
-                    self.password = password
-                    self.hostname = hostname
+                    self.client.username = username
+                    self.client.password = password
+                    self.client.hostname = hostname
                     
                     # Test connection
                     connection_success = self.test_connection()
@@ -599,7 +1089,7 @@ class HPCJobMonitor:
             
             def update_ui(success, save):
                 if success:
-                    self.authenticated = True
+                    self.client.authenticated = True
                     
                     # Save credentials if requested
                     if save:
@@ -623,8 +1113,8 @@ class HPCJobMonitor:
                     login_button.config(state="normal")
                     cancel_button.config(state="normal")
             
-            # Start login process
-            threading.Thread(target=process_login, daemon=True).start()
+            # Start login process; a newer attempt replaces one still queued
+            self.poller.submit(process_login, key=("login", self.client))
         
         # Buttons
         login_button = ttk.Button(button_frame, text="Login", command=on_login)
@@ -644,193 +1134,388 @@ class HPCJobMonitor:
         login_window.bind("<Escape>", lambda event: login_window.destroy())
 
     def test_connection(self):
-        """Test SSH connection with the credentials"""
-        if self.test_mode:
-            return True  # Always return success in test mode
-        
-        print(f"Attempting connection to {self.hostname}...")
-        try:
-            # Create new connection
-            ssh_client = paramiko.SSHClient()
-            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            print("Initiating SSH connection...")
-            # Connect with timeout
-            ssh_client.connect(
-                hostname=self.hostname, 
-                username=self.username, 
-                password=self.password,
-                timeout=5
-            )
-            
-            print("Testing connection with echo command...")
-            # Test a simple command
-            stdin, stdout, stderr = ssh_client.exec_command("echo Connection test successful")
-            result = stdout.read().decode().strip()
-            
-            print(f"Connection test result: {result}")
-            
-            # Store the client if successful
-            self.ssh_client = ssh_client
-            return "Connection test successful" in result
-        except Exception as e:
-            print(f"Connection test failed with error: {e}")
-            return False
+        """Open the SSH session with the current credentials"""
+        return self.client.connect()
     
     def run_remote_command(self, command):
         """Run a command on the remote server via SSH"""
-        if not self.authenticated:
-            return None
-        
-        if self.test_mode:
-            # Return test data when in test mode - FIXED FORMAT
-            if command.startswith("squeue"):
-                # Format matches what get_jobs expects to parse
-                return """JOBID|NAME|STATE|TIME|NODES|CPUS|MEMORY
-12345|tensorflow_train|RUNNING|10:23|2|32|64000
-12346|data_preprocessing|PENDING|00:00|1|8|16000
-12347|genome_analysis|RUNNING|5:45|4|128|256000
-12348|pytorch_model|COMPLETED|12:30|8|256|512000
-12349|ml_training|PENDING|00:00|2|16|32000
-12350|batch_process|RUNNING|2:15|1|4|8000
-12351|failed_job|FAILED|05:21|2|64|128000
-12352|image_processing|RUNNING|8:33|4|96|192000
-12353|awaiting_resources|PENDING|00:00|8|512|1024000"""
-            return ""
-        
-        # Use lock for thread safety
-        with self.ssh_lock:
-            try:
-                # Check if we have an active connection
-                if not self.ssh_client or not self.ssh_client.get_transport() or not self.ssh_client.get_transport().is_active():
-                    # Reconnect if needed
-                    if not self.test_connection():
-                        print("SSH connection lost and reconnection failed")
-                        self.update_login_status(False)
-                        self.authenticated = False
-                        return None
-                
-                # Execute command
-                stdin, stdout, stderr = self.ssh_client.exec_command(command)
-                output = stdout.read().decode()
-                error = stderr.read().decode()
-                
-                if error and not output:
-                    print(f"Command error: {error}")
-                    return None
-                    
-                return output
-            except Exception as e:
-                print(f"Error running remote command: {e}")
-                # Try to reconnect on next command
-                self.disconnect()
-                return None
+        return self.client.run_remote_command(command)
     
     def get_jobs(self):
         """Get job information from the HPC system"""
-        if not self.authenticated:
-            return []
-        
-        squeue_output = self.run_remote_command(
-            f"squeue -u {self.username} -o '%A|%j|%T|%M|%D|%C|%m'"
-        )
-        
-        if not squeue_output:
-            return []
-        
-        jobs = []
-        for line in squeue_output.strip().split('\n'):
-            if line and not line.startswith("JOBID"):
-                try:
-                    parts = line.split('|')
-                    if len(parts) >= 7:
-                        job_id, name, status, runtime, nodes, cpus, memory = parts[:7]
-                        jobs.append(JobInfo(
-                            job_id=job_id.strip(),
-                            name=name.strip(),
-                            status=status.strip(),
-                            time=runtime.strip(),
-                            nodes=nodes.strip(),
-                            cpus=cpus.strip(),
-                            memory=JobInfo.format_memory(memory)
-                        ))
-                except ValueError as e:
-                    print(f"Error parsing job data: {e}, line: {line}")
-                    continue
-        
-        return jobs
+        return self.client.get_jobs()
     
-    def refresh_jobs(self):
-        """Refresh the job list display"""
-        if not self.authenticated:
+    def refresh_jobs(self, client=None):
+        """Refresh the job list display for one cluster, or all of them"""
+        if not self.client.authenticated and client is None:
             if not self.test_mode:
                 messagebox.showinfo("Not Authenticated", "Please log in first")
                 self.handle_login()
             return
         
-        # Use threading for job refresh to keep UI responsive
-        threading.Thread(target=self._async_refresh_jobs, daemon=True).start()
-        self.root.after(100, self._check_refresh_result)
+        # Fetch in the background to keep the UI responsive; clusters are
+        # fetched by separate workers so a slow one never blocks the rest
+        for target in ([client] if client else self.active_clients()):
+            seq = self.refreshes.request(target)
+            if seq is None:
+                # A fetch for this cluster is still running; one follow-up
+                # fetch covers this and any other request made meanwhile
+                continue
+            timing = RefreshTiming(target.name or target.hostname)
+            self.fetchers.grow(len(self.active_clients()))
+            task = self.fetchers.submit(self._async_refresh_jobs, target, seq, timing,
+                                      key=("refresh", target),
+                                      on_cancel=lambda target=target: self.refreshes.finish(target))
+            if task is None:
+                self.refreshes.finish(target)
+                # No result will come back to plan the next poll from
+                if (self.auto_refresh.get() and target not in self.streams
+                        and target not in self.refresh_timers):
+                    self._schedule_refresh(target)
     
-    def _async_refresh_jobs(self):
+    def _async_refresh_jobs(self, client, seq, timing=None):
         """Asynchronously fetch job data"""
+        started = time.monotonic()
         try:
-            jobs = self.get_jobs()
-            self.result_queue.put(("refresh", jobs))
+            # squeue and any due sacct query share one round trip, whose
+            # latency drives the scheduler's back-off
+            jobs = client.get_jobs(timing, history=self.show_history.get())
         except Exception as e:
             print(f"Error in async refresh: {e}")
-            self.result_queue.put(("refresh", None))
+            jobs = None
+        latency = time.monotonic() - started
+        if timing is not None:
+            timing.mark("merged")
+        self._deliver(("refresh", client, seq, jobs, latency, timing))
+    
+    def _deliver(self, result):
+        """Queue a result from a worker thread and wake the Tk loop for it"""
+        self.result_queue.put(result)
+        try:
+            # Tk hands events generated on other threads to the main loop
+            self.root.event_generate(RESULT_EVENT, when="tail")
+        except (tk.TclError, RuntimeError):
+            # The window is already gone
+            pass
     
     def _check_refresh_result(self):
         """Check for results from the async job refresh"""
+        updated = False
+        timings = []
+        while True:
+            try:
+                action, client, seq, jobs, latency, timing = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
+            if action != "refresh":
+                continue
+            if latency is not None:
+                # A polled fetch finished; plan the next one from here
+                follow_up = self.refreshes.finish(client)
+                self._scheduler_for(client).complete(jobs, latency)
+                if follow_up and client.authenticated:
+                    # Refreshes were requested while it ran; its data may
+                    # predate them, so fetch once more right away
+                    self.refresh_jobs(client)
+                elif (self.auto_refresh.get() and client.authenticated
+                        and client not in self.streams and client not in self.refresh_timers):
+                    self._schedule_refresh(client)
+            if jobs is not None and not self.refreshes.accept(client, seq):
+                # A newer result for this cluster was already shown
+                continue
+            if timing is not None:
+                timing.mark("delivered")
+                timings.append(timing)
+            if jobs is None and latency is not None and client in self.cluster_jobs:
+                # The fetch failed; keep its last rows on screen, flagged as old
+                self.stale_clusters.add(client)
+                self.update_staleness()
+            if jobs is not None:
+                # sstat only sees the user's own jobs
+                self._usage_for(client).track(jobs if client.scope.kind == "user" else [])
+                self._sample_usage(client)
+                self.cluster_jobs[client] = jobs
+                self.cluster_updated[client] = time.time()
+                self.stale_clusters.discard(client)
+                updated = True
+        
+        if updated:
+            self._render_jobs()
+            self.user_label.config(text=f"{self.client.username}@{self.client.hostname}")
+        if timings:
+            self._report_timings(timings)
+    
+    def _render_jobs(self):
+        """Show the latest known jobs of every cluster in the tree"""
+        jobs = []
+        for client in self.cluster_jobs:
+            jobs.extend(self.cluster_jobs[client])
+        
+        status_counts = {"running": 0, "pending": 0, "completed": 0, "failed": 0}
+        for job in jobs:
+            status_counts[job.tag] += job.task_count
+        
+        # Job keys double as Treeview iids so rows can be diffed. Task rows
+        # of an array are only built while it is expanded.
+        rows = []
+        entries = group_arrays(jobs) if self.group_arrays.get() else jobs
+        arrays = set()
+        for entry in entries:
+            if isinstance(entry, JobArray):
+                arrays.add(entry.key)
+                expanded = entry.key in self.expanded_arrays
+                rows.append(self._job_row(entry, ("▾ " if expanded else "▸ ") + entry.name))
+                if expanded:
+                    rows.extend(self._job_row(task, "    " + task.name) for task in entry.tasks())
+            else:
+                rows.append(self._job_row(entry))
+        self.expanded_arrays &= arrays
+        self.table.set_rows(rows)
+        
+        # Update summary with Unicode box drawing characters
+        summary = (f"Running: {status_counts['running']:2d} │ "
+                  f"Pending: {status_counts['pending']:2d} │ "
+                  f"Completed: {status_counts['completed']:2d} │ "
+                  f"Failed: {status_counts['failed']:2d}")
+        self.update_staleness()
+        self.update_page_controls()
+    
+    def update_page_controls(self):
+        """Show which page of a large scope is on screen"""
+        if not self.scope.paged:
+            self.page_label.config(text="")
+            self.prev_page_btn.state(["disabled"])
+            self.next_page_btn.state(["disabled"])
+            return
+        pages = []
+        more = False
+        for client, jobs in self.cluster_jobs.items():
+            if client.total_jobs is None:
+                continue
+            text = self.scope.describe(len(jobs), client.total_jobs)
+            pages.append(f"{client.name}: {text}" if len(self.cluster_jobs) > 1 else text)
+            more = more or (self.scope.page + 1) * self.scope.page_size < client.total_jobs
+        self.page_label.config(text=" │ ".join(pages))
+        self.prev_page_btn.state(["!disabled" if self.scope.page else "disabled"])
+        self.next_page_btn.state(["!disabled" if more else "disabled"])
+    
+    def apply_scope(self, event=None):
+        """Switch every cluster to the scope and states typed in the scope bar"""
         try:
-            while not self.result_queue.empty():
-                action, jobs = self.result_queue.get_nowait()
-                if action == "refresh" and jobs is not None:
-                    # Clear current items
-                    for item in self.tree.get_children():
-                        self.tree.delete(item)
-                    
-                    status_counts = {"running": 0, "pending": 0, "completed": 0, "failed": 0}
-                    
-                    # Create tags for different status colors
-                    self.tree.tag_configure('running', foreground=DarkTheme.RUNNING_COLOR)
-                    self.tree.tag_configure('pending', foreground=DarkTheme.PENDING_COLOR)
-                    self.tree.tag_configure('completed', foreground=DarkTheme.COMPLETED_COLOR)
-                    self.tree.tag_configure('failed', foreground=DarkTheme.FAILED_COLOR)
-                    
-                    for job in jobs:
-                        tag = job.tag
-                        status_counts[tag] += 1
-                        
-                        # Insert job with appropriate tag
-                        self.tree.insert("", "end",
-                            values=(
-                                job.job_id,
-                                job.name,
-                                job.status,
-                                job.time,
-                                job.nodes,
-                                job.cpus,
-                                job.memory
-                            ),
-                            tags=(tag,)
-                        )
-                    
-                    # Update summary with Unicode box drawing characters
-                    summary = (f"Running: {status_counts['running']:2d} │ "
-                              f"Pending: {status_counts['pending']:2d} │ "
-                              f"Completed: {status_counts['completed']:2d} │ "
-                              f"Failed: {status_counts['failed']:2d}")
-                    self.last_updated.config(text=f"Last updated: {datetime.now().strftime('%H:%M:%S')}")
-                    
-                    # Update timestamp
-                    now = datetime.now().strftime("%H:%M:%S")
-                    self.user_label.config(text=f"{self.username}@{self.hostname}")
-                    return
-        except queue.Empty:
-            self.root.after(100, self._check_refresh_result)
+            scope = Scope.parse(self.scope_var.get(), self.states_var.get())
+        except ValueError as e:
+            messagebox.showerror("Invalid scope", str(e))
+            return
+        if scope == self.scope:
+            return
+        self._set_scope(scope)
+    
+    def _on_scope_selected(self, scope_box):
+        """Apply a choice from the scope bar, unless a name still has to be typed"""
+        if self.scope_var.get().strip().endswith(":"):
+            # "account:" and "partition:" are only starting points
+            scope_box.focus_set()
+            scope_box.icursor(tk.END)
+            scope_box.selection_clear()
+            return
+        self.apply_scope()
+    
+    def change_page(self, delta):
+        """Show the previous or next page of a large scope"""
+        self.scope.page = max(0, self.scope.page + delta)
+        for client in [self.client] + self.extra_clients:
+            # Anything still in flight is for the old page
+            self.refreshes.invalidate(client)
+        if self.active_clients():
+            # Streams run the old page's squeue command; restart them
+            if self.auto_refresh.get():
+                self.start_auto_refresh()
+            self.refresh_jobs()
+        self.update_page_controls()
+    
+    def _set_scope(self, scope):
+        self.scope = scope
+        self.scope_var.set(str(scope))
+        self.states_var.set(scope.states)
+        for client in [self.client] + self.extra_clients:
+            client.scope = scope
+            client.total_jobs = None
+            self.refreshes.invalidate(client)
+        # The old scope's rows would be mislabelled until the first fetch
+        self.cluster_jobs.clear()
+        self.expanded_arrays.clear()
+        self._render_jobs()
+        if self.active_clients():
+            # Streams run the old squeue command; restart them
+            if self.auto_refresh.get():
+                self.start_auto_refresh()
+            self.refresh_jobs()
+    
+    def _report_timings(self, timings):
+        """Log finished refresh timings and show them if the overlay is on"""
+        # Measured once Tk has drawn the new rows
+        self.root.update_idletasks()
+        for timing in timings:
+            timing.mark("rendered")
+            self.timing_log.info(timing.log_line())
+        multi = len(self.active_clients()) > 1
+        self.timing_label.config(text=" │ ".join(
+            f"{timing.cluster}: {timing.summary()}" if multi else timing.summary()
+            for timing in timings))
+    
+    def toggle_timings(self):
+        """Show or hide the refresh timing overlay"""
+        if self.show_timings.get():
+            self.timing_label.pack(side=tk.RIGHT, padx=5)
+        else:
+            self.timing_label.pack_forget()
+    
+    def _job_row(self, job, name=None):
+        return (job.key,
+                (job.cluster, job.display_id, job.name if name is None else name,
+                 job.status, job.time, job.nodes, job.cpus, job.memory, self._usage_text(job)),
+                job.tag)
+    
+    def _usage_text(self, job):
+        """Return the usage sparkline of a running job, or an empty string"""
+        if job.status != "RUNNING" or not isinstance(job, JobInfo) or not self.show_usage.get():
+            return ""
+        for client, sampler in self.usage.items():
+            if client.name == job.cluster:
+                return sampler.summary(job)
+        return ""
+    
+    def _job_for_row(self, iid):
+        """Return ``(client, job id)`` for a table row, or None"""
+        cluster, _, job_id = iid.rpartition("/")
+        # An array's row, and a pending range of its tasks such as
+        # 123_[4-500%8], stand for the whole array; scontrol rejects ranges
+        job_id = job_id.split("_[", 1)[0]
+        for client in [self.client] + self.extra_clients:
+            if client.name == cluster or (not cluster and client is self.client):
+                return client, job_id
+        return None
+    
+    def _on_job_selected(self, event=None):
+        """Show the selected job's details, fetching them only if not cached"""
+        selection = self.tree.selection()
+        if len(selection) != 1:
+            return
+        target = self._job_for_row(selection[0])
+        if target is None or target in (self.detail_key, self.detail_closed):
+            # Already on show (or closed); re-renders select the same row again
+            return
+        self.detail_key = target
+        self.detail_closed = None
+        self.detail_frame.pack(fill=tk.X, pady=(5, 0), after=self.table_frame)
+        
+        details = self.details.get(target)
+        self._fill_details(target, details)
+        if details is None and self.details.begin(target):
+            # Only the newest lookup waits in the queue while keys are held down
+            task = self.poller.submit(self._fetch_details, target, key="details",
+                                      on_cancel=lambda: self.details.cancel(target))
+            if task is None:
+                self.details.cancel(target)
+    
+    def _fetch_details(self, target):
+        """Run scontrol for a job off the UI thread"""
+        client, job_id = target
+        try:
+            details = client.get_job_details(job_id)
+        except Exception as e:
+            print(f"Error fetching details of job {job_id}: {e}")
+            details = None
+        self.details.put(target, details)
+        self.root.after(0, lambda: self._on_details_fetched(target, details))
+    
+    def _on_details_fetched(self, target, details):
+        if target == self.detail_key:
+            self._fill_details(target, details, loading=False)
+    
+    def _fill_details(self, target, details, loading=True):
+        client, job_id = target
+        cluster = f" on {client.name}" if client.name else ""
+        self.detail_title.config(text=f"Job {job_id}{cluster}")
+        self.detail_stdout = details.get("StdOut") if details else None
+        self.tail_btn.state(["!disabled" if self.detail_stdout else "disabled"])
+        if details is not None:
+            text = "\n".join(f"{label + ':':<13}{value}" for label, value in format_details(details))
+        else:
+            text = "Loading..." if loading else "No details available"
+        self.detail_text.config(state="normal")
+        self.detail_text.delete("1.0", tk.END)
+        self.detail_text.insert(tk.END, text)
+        self.detail_text.config(state="disabled")
+    
+    def tail_output(self):
+        """Follow the stdout file of the job in the detail panel"""
+        path = self.detail_stdout
+        if self.detail_key is None or not path:
+            return
+        if path in self.tails:
+            self.tails[path].window.lift()
+            return
+        client, job_id = self.detail_key
+        self.tails[path] = LogTailWindow(self.root, self.poller, client, f"Job {job_id}", path,
+                                         on_close=lambda: self.tails.pop(path, None))
+    
+    def hide_details(self):
+        """Close the detail panel"""
+        self.detail_frame.pack_forget()
+        # Stay closed until another job is selected
+        self.detail_closed = self.detail_key
+        self.detail_key = None
+    
+    def _toggle_array(self, event):
+        """Show or hide the task rows of the job array under the cursor"""
+        iid = self.tree.identify_row(event.y) if event.type == tk.EventType.ButtonPress else self.tree.focus()
+        if not iid or not iid.endswith("_[*]"):
+            return
+        if iid in self.expanded_arrays:
+            self.expanded_arrays.discard(iid)
+        else:
+            self.expanded_arrays.add(iid)
+        self._render_jobs()
+        return "break"
+    
+    def update_staleness(self):
+        """Show when the data was fetched, flagging cached or offline data"""
+        if not self.cluster_updated:
+            return
+        if self.stale_clusters:
+            oldest = min(self.cluster_updated[client] for client in self.stale_clusters)
+            stamp = datetime.fromtimestamp(oldest).strftime('%H:%M:%S')
+            self.last_updated.config(
+                text=f"Cached: {stamp} ({describe_age(oldest)})",
+                foreground=DarkTheme.PENDING_COLOR)
+        else:
+            stamp = datetime.fromtimestamp(max(self.cluster_updated.values())).strftime('%H:%M:%S')
+            self.last_updated.config(text=f"Last updated: {stamp}",
+                                     foreground=DarkTheme.TEXT_COLOR)
+    
+    def _show_cached_jobs(self, client):
+        """Render a cluster's last cached snapshot until live data arrives"""
+        cached = client.load_cached_jobs()
+        if cached is None or client in self.cluster_jobs:
+            return
+        fetched_at, jobs = cached
+        self.cluster_jobs[client] = jobs
+        self.cluster_updated[client] = fetched_at
+        self.stale_clusters.add(client)
+        self._render_jobs()
 
+    def toggle_history(self):
+        """Refetch so finished jobs appear or disappear right away"""
+        if self.active_clients():
+            self.refresh_jobs()
+    
+    def toggle_usage(self):
+        """Start or stop sending sstat with each refresh"""
+        for sampler in self.usage.values():
+            sampler.enabled = self.show_usage.get()
+        self._render_jobs()
+    
     def toggle_auto_refresh(self):
         """Toggle auto-refresh on/off"""
         if self.auto_refresh.get():
@@ -838,31 +1523,169 @@ class HPCJobMonitor:
         else:
             self.stop_auto_refresh()
     
+    def _usage_for(self, client):
+        """Return a cluster's usage sampler"""
+        if client not in self.usage:
+            sampler = self.usage[client] = UsageSampler()
+            sampler.enabled = self.show_usage.get()
+        return self.usage[client]
+    
+    def _sample_usage(self, client):
+        """Run sstat for a cluster's running jobs in the background.
+        
+        sstat asks slurmd on every node with a running job, so it is kept
+        out of the refresh: the table and the scheduler's latency only wait
+        for squeue.
+        """
+        sampler = self.usage.get(client)
+        if sampler is None or client in self.sampling or not client.authenticated:
+            return
+        command = sampler.command()
+        if command is None:
+            return
+        
+        def sample():
+            output = None
+            try:
+                output = client.run_remote_command(command)
+                sampler.apply(output)
+            finally:
+                self.root.after(0, lambda: self._on_usage_sampled(client, output))
+        
+        def cancelled():
+            self.root.after(0, lambda: self.sampling.discard(client))
+        
+        self.sampling.add(client)
+        if self.poller.submit(sample, key=("usage", client), on_cancel=cancelled) is None:
+            self.sampling.discard(client)
+    
+    def _on_usage_sampled(self, client, output):
+        self.sampling.discard(client)
+        if output and self.show_usage.get():
+            self._render_jobs()
+    
+    def _scheduler_for(self, client):
+        """Return the adaptive scheduler tracking a cluster's fetches"""
+        if client not in self.schedulers:
+            self.schedulers[client] = AdaptiveScheduler(initial_interval=30)
+        return self.schedulers[client]
+    
+    def _interval_for(self, client):
+        """Return the refresh interval in seconds for a cluster"""
+        return (client.refresh_interval or self.refresh_interval
+                or self._scheduler_for(client).next_interval())
+    
     def start_auto_refresh(self):
-        """Start the auto-refresh timer"""
-        self.stop_auto_refresh()  # Stop any existing timer
+        """Start one auto-refresh timer per connected cluster"""
+        self.stop_auto_refresh()  # Stop any existing timers
         
-        if self.auto_refresh.get() and self.authenticated:
-            # Schedule refresh
-            self.refresh_timer = self.root.after(self.refresh_interval * 1000, self.auto_refresh_callback)
+        if self.auto_refresh.get():
+            for client in self.active_clients():
+                if self.stream_mode.get():
+                    # Falls back to a timer if the stream cannot be opened
+                    self._start_stream(client)
+                    continue
+                # Schedule refresh
+                self._schedule_refresh(client)
+    
+    def _schedule_refresh(self, client):
+        self.refresh_timers[client] = self.root.after(
+            int(self._interval_for(client) * 1000), lambda: self.auto_refresh_callback(client))
+    
+    def _cancel_timer(self, client):
+        """Stop the timer or stream refreshing a cluster"""
+        timer = self.refresh_timers.pop(client, None)
+        if timer:
+            self.root.after_cancel(timer)
+        stream = self.streams.pop(client, None)
+        if stream:
+            stream.stop()
     
     def stop_auto_refresh(self):
-        """Stop the auto-refresh timer"""
-        if self.refresh_timer:
-            self.root.after_cancel(self.refresh_timer)
-            self.refresh_timer = None
-    
-    def auto_refresh_callback(self):
-        """Callback for auto-refresh timer"""
-        if self.auto_refresh.get() and self.authenticated:
-            self.refresh_jobs()
-            # Reschedule
-            self.refresh_timer = self.root.after(self.refresh_interval * 1000, self.auto_refresh_callback)
+        """Stop all auto-refresh timers and streams"""
+        for client in list(self.refresh_timers) + list(self.streams):
+            self._cancel_timer(client)
+    
+    def _start_stream(self, client):
+        """Stream a cluster's job changes over one channel.
+        
+        Opening the channel may mean reconnecting, so it happens on the
+        poller; the stream is registered right away so no timer is started
+        for the cluster meanwhile. Its cadence is the interval in effect
+        now; the adaptive scheduler only learns from polled fetches, so it
+        stays fixed until auto-refresh is restarted (e.g. a new interval).
+        """
+        stream = JobStream(
+            client, self._interval_for(client),
+            on_update=lambda jobs: self._on_stream_update(client, jobs),
+            on_closed=lambda: self.root.after(0, lambda: self._on_stream_closed(client))
+        )
+        self.streams[client] = stream
+        
+        def start():
+            started = stream.start()
+            self.root.after(0, lambda: self._on_stream_started(client, stream, started))
+        
+        def cancelled():
+            self.root.after(0, lambda: self._on_stream_started(client, stream, False))
+        
+        if self.poller.submit(start, key=("stream", client), on_cancel=cancelled) is None:
+            self._on_stream_started(client, stream, False)
+    
+    def _on_stream_started(self, client, stream, started):
+        if self.streams.get(client) is not stream:
+            # Stopped or replaced while it was opening
+            if started:
+                stream.stop()
+            return
+        if started:
+            return
+        del self.streams[client]
+        print(f"Could not start job stream on {client.hostname}, polling instead")
+        if self.auto_refresh.get() and client.authenticated:
+            self._schedule_refresh(client)
+    
+    def _on_stream_update(self, client, jobs):
+        """Hand a streamed job table to the UI thread"""
+        seq = self.refreshes.sequence(client)
+        if self.show_history.get():
+            # Runs on the stream's reader thread, so a sacct call is fine here
+            jobs = merge_history(jobs, client.get_finished_jobs(jobs))
+        self._deliver(("refresh", client, seq, jobs, None, None))
+    
+    def _on_stream_closed(self, client):
+        """Fall back to polling when a cluster's stream ends unexpectedly"""
+        if self.streams.pop(client, None) is None:
+            return
+        print(f"Job stream from {client.hostname} closed, polling instead")
+        if self.auto_refresh.get() and client.authenticated:
+            self._schedule_refresh(client)
+    
+    def auto_refresh_callback(self, client):
+        """Callback for a cluster's auto-refresh timer"""
+        self.refresh_timers.pop(client, None)
+        if self.auto_refresh.get() and client.authenticated:
+            # The next poll is scheduled once this fetch completes, so a
+            # slow squeue stretches the cycle instead of stacking fetches
+            self.refresh_jobs(client)
     
     def on_closing(self):
         """Clean up before closing"""
         self.stop_auto_refresh()
+        # Drop queued work; closing the connections ends any running SSH calls
+        self.poller.stop()
+        self.fetchers.stop()
         self.disconnect()
+        for client in self.extra_clients:
+            client.disconnect()
+        self._finish_closing(time.monotonic() + CLOSE_TIMEOUT)
+    
+    def _finish_closing(self, deadline):
+        """Destroy the window once the workers exit, or the deadline passes"""
+        # Keep the Tk loop running meanwhile: workers may still be handing it results
+        if (self.poller.busy or self.fetchers.busy) and time.monotonic() < deadline:
+            self.root.after(50, lambda: self._finish_closing(deadline))
+            return
         self.root.destroy()
 
     def start_drag(self, event):
@@ -883,9 +1706,9 @@ class HPCJobMonitor:
         print("Processing login asynchronously")  # Debug print
         try:
             # Update credentials
-            self.username = credentials['username']
-            self.password = credentials['password']
-            self.hostname = credentials['hostname']
+            self.client.username = credentials['username']
+            self.client.password = credentials['password']
+            self.client.hostname = credentials['hostname']
             
             print("Testing connection...")  # Debug print
             # Show a "connecting" message
@@ -899,7 +1722,7 @@ class HPCJobMonitor:
             def update_ui():
                 print("Updating UI after connection test")  # Debug print
                 if connection_success:
-                    self.authenticated = True
+                    self.client.authenticated = True
                     self.update_login_status(True)
                     
                     # Save credentials if requested
@@ -911,7 +1734,7 @@ class HPCJobMonitor:
                     self.refresh_jobs()
                 else:
                     print("Authentication failed")  # Debug print
-                    self.authenticated = False
+                    self.client.authenticated = False
                     self.update_login_status(False)
                     messagebox.showerror("Authentication Failed", 
                                        "Could not authenticate with the provided credentials.\n"
@@ -931,10 +1754,13 @@ class HPCJobMonitor:
             if not os.path.exists(os.path.dirname(self.config_file)):
                 os.makedirs(os.path.dirname(self.config_file))
             
-            config = {
+            # Keep other settings, such as additional clusters
+            config = load_config(self.config_file)
+            config.pop("password", None)
+            config.update({
                 "username": credentials['username'],
                 "hostname": credentials['hostname']
-            }
+            })
             
             if credentials['save']:
                 config["password"] = credentials['password']
@@ -951,7 +1777,7 @@ class HPCJobMonitor:
     def update_login_status(self, is_logged_in):
         """Update UI elements to reflect login status"""
         if is_logged_in:
-            self.user_label.config(text=f"{self.username}@{self.hostname}")
+            self.user_label.config(text=f"{self.client.username}@{self.client.hostname}")
             self.login_btn.config(text="Change Login")
             # Start auto-refresh if enabled
             if self.auto_refresh.get():
@@ -959,19 +1785,16 @@ class HPCJobMonitor:
         else:
             self.user_label.config(text="Not logged in")
             self.login_btn.config(text="Login")
-            # Stop auto-refresh
-            self.stop_auto_refresh()
+            # Keep the last jobs on screen, flagged as offline
+            if self.client in self.cluster_jobs:
+                self.stale_clusters.add(self.client)
+                self.update_staleness()
+            # Stop auto-refresh for this login; other clusters keep polling
+            self._cancel_timer(self.client)
     
     def disconnect(self):
         """Disconnect SSH client if connected"""
-        print("Disconnecting...")
-        try:
-            if self.ssh_client:
-                self.ssh_client.close()
-                self.ssh_client = None
-            print("Disconnected")
-        except Exception as e:
-            print(f"Error disconnecting: {e}")
+        self.client.disconnect()
 
     def update_refresh_interval(self, event=None):
         """Update the refresh interval based on dropdown selection"""
@@ -984,18 +1807,23 @@ class HPCJobMonitor:
                 self.stop_auto_refresh()
                 self.start_auto_refresh()
 
-def main():
-    # Parse command line arguments
-    parser = argparse.ArgumentParser(description='Slurm Watch - A job monitoring tool')
-    parser.add_argument('-t', '--test', 
-                       action='store_true',
-                       help='Run in test mode with sample data')
-    args = parser.parse_args()
-    
-    # Make sure required packages are installed
-    try:
-        from PIL import Image, ImageTk, ImageDraw
-    except ImportError:
+# Cold-start budget from process start to a painted window
+STARTUP_TARGET_MS = 300
+
+def profile_startup(start_time, stage, target_ms=None):
+    """Print how long startup took to reach ``stage`` (for --profile-startup)"""
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    line = f"[startup] {stage}: {elapsed_ms:.0f} ms"
+    if target_ms is not None:
+        verdict = "OK" if elapsed_ms <= target_ms else "over budget"
+        line += f" (target {target_ms} ms: {verdict})"
+    print(line, flush=True)
+
+def run_gui(args):
+    """Build the main window and run the Tk event loop"""
+    # Make sure required packages are installed. They are only located
+    # here, not imported, so loading them stays off the startup path.
+    if importlib.util.find_spec("PIL") is None:
         messagebox.showerror(
             "Missing Dependency", 
             "PIL/Pillow is required for this application.\n"
@@ -1003,9 +1831,7 @@ def main():
         )
         return
     
-    try:
-        import paramiko
-    except ImportError:
+    if importlib.util.find_spec("paramiko") is None:
         if not args.test:  # Only show error if not in test mode
             messagebox.showerror(
                 "Missing Dependency", 
@@ -1025,9 +1851,30 @@ def main():
         )
         return
     
+    profile = getattr(args, "profile_startup", False)
+    if profile:
+        profile_startup(args.start_time, "modules imported")
+    
     root = tk.Tk()
     root.title("SWATCH - (Slurm Job Watcher)")  # Set window title
-    app = HPCJobMonitor(root, test_mode=args.test)
+    metrics = None
+    if args.metrics_port:
+        # Only imported when asked for, to keep it off the startup path
+        from .metrics import Metrics, start_metrics_server
+        metrics = Metrics()
+        start_metrics_server(metrics, args.metrics_port)
+    app = HPCJobMonitor(root, test_mode=args.test, simulator=SyntheticCluster.from_args(args),
+                        metrics=metrics)
+    
+    if profile:
+        profile_startup(args.start_time, "window built")
+        # <Map> fires once the window is actually shown on screen
+        def on_visible(event):
+            if event.widget is root:
+                root.unbind("<Map>")
+                root.after_idle(lambda: profile_startup(
+                    args.start_time, "window visible", target_ms=STARTUP_TARGET_MS))
+        root.bind("<Map>", on_visible)
     
     # Center the window on screen
     root.update_idletasks()
@@ -1040,5 +1887,10 @@ def main():
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
     root.mainloop()
 
+def main():
+    # Argument parsing lives in swatch.cli so headless mode can skip Tk
+    from .cli import main as cli_main
+    return cli_main()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""squeue's JSON output, and negotiating it with the cluster.
+
+The ``-o SQUEUE_FORMAT`` text output parsed by ``parse_squeue_output`` is
+the default: it is delimiter-safe and, per ``benchmarks/bench_parse.py``,
+roughly ten times faster to parse and a tenth of the bytes of JSON.
+``squeue --json`` (Slurm 21.08 and later) can be chosen with the
+``squeue_format`` config key; clusters that are too old, or whose Slurm
+was built without a JSON data parser, fall back to text.
+
+The JSON schema changed between releases: plain numbers became
+``{"set": ..., "infinite": ..., "number": ...}`` objects in 23.02 and
+``job_state`` became a list. Both forms are accepted.
+"""
+
+import json
+import re
+import sys
+import time
+
+from .jobs import JobInfo, format_duration
+
+# First Slurm release whose squeue accepts --json
+JSON_MIN_VERSION = (21, 8)
+
+_VERSION_RE = re.compile(r"(\d+)\.(\d+)")
+# squeue errors meaning --json itself cannot work, as opposed to a controller
+# timeout or other passing failure
+_JSON_UNSUPPORTED_RE = re.compile(
+    r"unrecognized option|invalid option|unknown option|data_parser|serializer", re.IGNORECASE)
+
+
+def parse_slurm_version(output):
+    """Return ``(major, minor)`` from ``squeue --version`` output, or None"""
+    match = _VERSION_RE.search(output or "")
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def json_unsupported(error):
+    """Return True if squeue's stderr says it cannot produce JSON"""
+    return bool(_JSON_UNSUPPORTED_RE.search(error or ""))
+
+
+def choose_format(version):
+    """Return ``"json"`` or ``"text"`` for a Slurm version tuple (or None)"""
+    return "json" if version is not None and version >= JSON_MIN_VERSION else "text"
+
+
+def _number(value):
+    """Unwrap a plain or 23.02-style number; None if unset, inf if infinite"""
+    if isinstance(value, dict):
+        if value.get("infinite"):
+            return float("inf")
+        if not value.get("set", True):
+            return None
+        return value.get("number")
+    return value
+
+
+def parse_squeue_json(output, cluster="", username=None, now=None):
+    """Parse ``squeue --json`` output into JobInfo records.
+
+    Only jobs of ``username`` are kept, since some releases ignore ``-u``
+    together with ``--json``. Returns None if the output is not squeue JSON.
+    """
+    try:
+        records = json.loads(output)["jobs"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    now = now or time.time()
+    intern = sys.intern
+    jobs = []
+    for record in records:
+        if username and record.get("user_name", username) != username:
+            continue
+
+        state = record.get("job_state")
+        if isinstance(state, list):
+            state = state[0] if state else ""
+
+        start = _number(record.get("start_time")) or 0
+        end = _number(record.get("end_time")) or 0
+        if state == "PENDING" or not start or start > now:
+            runtime = 0
+        else:
+            runtime = max(0, (end if 0 < end < now else now) - start)
+
+        limit = _number(record.get("time_limit"))
+        if limit is None:
+            time_left = ""
+        elif limit == float("inf"):
+            time_left = "UNLIMITED"
+        else:
+            time_left = format_duration(max(0, limit * 60 - runtime))
+
+        cpus = _number(record.get("cpus")) or 0
+        memory = _number(record.get("memory_per_node"))
+        if not memory:
+            # Older releases report an unused per-node request as 0
+            per_cpu = _number(record.get("memory_per_cpu"))
+            memory = per_cpu * cpus if per_cpu else memory
+
+        job_id = str(record["job_id"])
+        array_job_id = _number(record.get("array_job_id")) or 0
+        task = _number(record.get("array_task_id"))
+        if record.get("array_task_string"):
+            # The pending remainder of an array, still one record
+            array_task_id = record["array_task_string"]
+        elif array_job_id and task is not None:
+            array_task_id = str(task)
+        else:
+            array_task_id = "N/A"
+
+        jobs.append(JobInfo(
+            job_id, intern(record.get("name", "")), intern(state),
+            format_duration(runtime), str(_number(record.get("node_count")) or 0),
+            str(cpus), intern(JobInfo.format_memory(str(memory)) if memory is not None else ""),
+            time_left, cluster, "",
+            str(array_job_id) if array_job_id else job_id, array_task_id
+        ))
+    return jobs
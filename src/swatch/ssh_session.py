@@ -0,0 +1,187 @@
+"""Persistent, multiplexed SSH session used for all remote commands."""
+
+import socket
+import threading
+
+import paramiko
+
+
+class SSHSessionManager:
+    """Keep one long-lived SSH transport and run commands on parallel channels.
+
+    The transport is authenticated once and kept alive with keepalive packets.
+    Every command gets its own channel on that transport, so several callers
+    can run commands at the same time without paying for a new handshake.
+    The transport is only rebuilt when it has actually died.
+    """
+
+    def __init__(self, hostname, username, password, timeout=5,
+                 keepalive_interval=30, max_channels=4):
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.keepalive_interval = keepalive_interval
+
+        self._client = None
+        self._connect_lock = threading.Lock()
+        self._channel_slots = threading.BoundedSemaphore(max_channels)
+        self.reconnect_count = 0
+        # One SFTP channel, opened on first use, for reading files in place
+        self._sftp = None
+        self._sftp_lock = threading.Lock()
+
+    @property
+    def transport(self):
+        """Return the underlying paramiko transport, if any"""
+        return self._client.get_transport() if self._client else None
+
+    def is_alive(self):
+        """Return True if the transport is connected and authenticated"""
+        transport = self.transport
+        return bool(transport and transport.is_active() and transport.is_authenticated())
+
+    def connect(self):
+        """Open and authenticate the transport. Returns True on success."""
+        with self._connect_lock:
+            if self.is_alive():
+                return True
+            return self._connect_locked()
+
+    def _connect_locked(self):
+        self._close_client()
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(
+                hostname=self.hostname,
+                username=self.username,
+                password=self.password,
+                timeout=self.timeout
+            )
+        except Exception as e:
+            print(f"SSH connection to {self.hostname} failed: {e}")
+            client.close()
+            return False
+
+        client.get_transport().set_keepalive(self.keepalive_interval)
+        self._client = client
+        return self.is_alive()
+
+    def _reconnect(self):
+        """Rebuild the transport unless another caller already did"""
+        with self._connect_lock:
+            if self.is_alive():
+                return True
+            self.reconnect_count += 1
+            print(f"SSH transport to {self.hostname} is down, reconnecting...")
+            return self._connect_locked()
+
+    def run(self, command, timeout=None):
+        """Run a command on its own channel.
+
+        Returns a ``(exit_status, stdout, stderr)`` tuple, or None if the
+        transport could not be (re)established.
+        """
+        with self._channel_slots:
+            for attempt in range(2):
+                if not self.is_alive() and not self._reconnect():
+                    return None
+                transport = self.transport
+                try:
+                    return self._exec(transport, command, timeout)
+                except (paramiko.SSHException, EOFError, socket.error) as e:
+                    if transport.is_active() or attempt:
+                        # The channel failed but the transport is fine (or
+                        # we already retried): report it without reconnecting
+                        print(f"Error running remote command: {e}")
+                        return None
+                    # Transport died under us; rebuild it and retry once
+                    if not self._reconnect():
+                        return None
+        return None
+
+    def _exec(self, transport, command, timeout):
+        channel = transport.open_session(timeout=self.timeout)
+        try:
+            if timeout is not None:
+                channel.settimeout(timeout)
+            channel.exec_command(command)
+            stdout = channel.makefile("rb")
+            stderr = channel.makefile_stderr("rb")
+            output = stdout.read().decode(errors="replace")
+            error = stderr.read().decode(errors="replace")
+            return channel.recv_exit_status(), output, error
+        finally:
+            channel.close()
+
+    def open_stream(self, command):
+        """Start a long-running command and return its open channel.
+
+        The channel does not count against ``max_channels``; the caller owns
+        it and must close it when done.
+        """
+        if not self.is_alive() and not self._reconnect():
+            return None
+        try:
+            channel = self.transport.open_session(timeout=self.timeout)
+            channel.exec_command(command)
+            return channel
+        except (paramiko.SSHException, EOFError, socket.error) as e:
+            print(f"Error starting remote stream: {e}")
+            return None
+
+    def read_file(self, path, offset, length, timeout=None):
+        """Read up to ``length`` bytes of a remote file, starting at ``offset``.
+
+        Returns ``(size, data)`` with the file's current size, or None if it
+        cannot be read. Only the requested range crosses the network. A
+        read that stalls for ``timeout`` seconds fails.
+        """
+        with self._sftp_lock:
+            for attempt in range(2):
+                if not self.is_alive() and not self._reconnect():
+                    return None
+                try:
+                    if self._sftp is None or self._sftp.get_channel().closed:
+                        self._sftp = self._client.open_sftp()
+                        self._sftp.get_channel().settimeout(timeout)
+                    size = self._sftp.stat(path).st_size
+                    if length <= 0 or offset >= size:
+                        return size, b""
+                    with self._sftp.open(path, "rb") as f:
+                        f.seek(offset)
+                        return size, f.read(min(length, size - offset))
+                except (paramiko.SSHException, EOFError) as e:
+                    # The SFTP channel broke; open a new one and retry once
+                    self._sftp = None
+                    if attempt:
+                        print(f"Error reading {path}: {e}")
+                        return None
+                except socket.timeout:
+                    # A late reply would be taken for the next request's; start afresh
+                    self._sftp.close()
+                    self._sftp = None
+                    print(f"Timed out reading {path}")
+                    return None
+                except OSError as e:
+                    # Missing file, no permission, or the connection dropped
+                    if self._sftp is not None and self._sftp.get_channel().closed:
+                        self._sftp = None
+                    print(f"Cannot read {path}: {e}")
+                    return None
+        return None
+
+    def _close_client(self):
+        self._sftp = None
+        if self._client:
+            try:
+                self._client.close()
+            except Exception as e:
+                print(f"Error closing SSH client: {e}")
+            self._client = None
+
+    def close(self):
+        """Close the transport and all of its channels"""
+        with self._connect_lock:
+            self._close_client()
@@ -0,0 +1,204 @@
+"""Compact, column-oriented storage for large numbers of jobs.
+
+A JobInfo is a handful of Python strings; tens of thousands of finished jobs
+kept for days add up. JobStore keeps the same records in typed arrays:
+numeric job ids, states as small integers into a shared table, runtimes
+in seconds and memory in bytes. Sorting and aggregation work on the
+numbers directly, and a JobInfo is only built when a row is asked for.
+"""
+
+from array import array
+from datetime import datetime
+
+from .jobs import JobInfo, format_duration, parse_duration, parse_memory_mb
+
+# Sentinels for the integer columns
+UNKNOWN = -1
+UNLIMITED = -2
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return UNKNOWN
+
+
+def _index_key(job_id):
+    # Numeric ids are indexed as ints so the id strings need not be kept
+    number = _to_int(job_id)
+    return job_id if number == UNKNOWN or str(number) != job_id else number
+
+
+def _to_seconds(value):
+    if value == "UNLIMITED":
+        return UNLIMITED
+    seconds = parse_duration(value) if value else None
+    return UNKNOWN if seconds is None else seconds
+
+
+def _from_seconds(seconds):
+    if seconds == UNLIMITED:
+        return "UNLIMITED"
+    return "" if seconds < 0 else format_duration(seconds)
+
+
+class _Symbols:
+    """Map repeated strings (states, clusters) to small integers"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class JobStore:
+    """Jobs stored as parallel typed columns instead of JobInfo objects"""
+
+    def __init__(self, jobs=()):
+        self.states = _Symbols()
+        self.clusters = _Symbols()
+        # Bumped on every change, so callers can cache what they build from it
+        self.version = 0
+        self._clear()
+        self.extend(jobs)
+
+    def _columns(self):
+        return (self.job_ids, self.state_codes, self.cluster_codes, self.runtime,
+                self.nodes, self.cpus, self.time_left, self.memory, self.ended)
+
+    def _clear(self):
+        self.job_ids = array("q")
+        self.state_codes = array("H")
+        self.cluster_codes = array("H")
+        self.runtime = array("i")
+        self.nodes = array("i")
+        self.cpus = array("i")
+        self.time_left = array("i")
+        self.memory = array("q")
+        self.ended = array("d")
+        self.names = []
+        # Rarely used values, keyed by row: non-numeric ids and array ids
+        self._id_text = {}
+        self._array_ids = {}
+        self._index = set()
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    def __contains__(self, job_id):
+        return _index_key(job_id) in self._index
+
+    def __iter__(self):
+        return (self.job(row) for row in range(len(self)))
+
+    def append(self, job):
+        """Add a JobInfo; jobs already stored (by id) are ignored"""
+        key = _index_key(job.job_id)
+        if key in self._index:
+            return
+        row = len(self)
+        self._index.add(key)
+        self.version += 1
+
+        if isinstance(key, int):
+            self.job_ids.append(key)
+        else:
+            self.job_ids.append(UNKNOWN)
+            self._id_text[row] = job.job_id
+        if job.array_job_id or job.array_task_id:
+            self._array_ids[row] = (job.array_job_id, job.array_task_id)
+
+        self.names.append(job.name)
+        self.state_codes.append(self.states.code(job.status))
+        self.cluster_codes.append(self.clusters.code(job.cluster))
+        self.runtime.append(_to_seconds(job.time))
+        self.nodes.append(_to_int(job.nodes))
+        self.cpus.append(_to_int(job.cpus))
+        self.time_left.append(_to_seconds(job.time_left))
+        memory_mb = parse_memory_mb(job.memory) if job.memory else None
+        self.memory.append(UNKNOWN if memory_mb is None else memory_mb * 1024 * 1024)
+        self.ended.append(job.ended_at)
+
+    def extend(self, jobs):
+        for job in jobs:
+            self.append(job)
+
+    def job_id(self, row):
+        return self._id_text.get(row) or str(self.job_ids[row])
+
+    def job(self, row):
+        """Build the JobInfo for one row"""
+        nodes, cpus, memory, ended = (self.nodes[row], self.cpus[row],
+                                      self.memory[row], self.ended[row])
+        array_job_id, array_task_id = self._array_ids.get(row, ("", ""))
+        return JobInfo(
+            job_id=self.job_id(row),
+            name=self.names[row],
+            status=self.states.values[self.state_codes[row]],
+            time=_from_seconds(self.runtime[row]),
+            nodes="" if nodes < 0 else str(nodes),
+            cpus="" if cpus < 0 else str(cpus),
+            memory="" if memory < 0 else JobInfo.format_memory(str(memory // (1024 * 1024))),
+            time_left=_from_seconds(self.time_left[row]),
+            cluster=self.clusters.values[self.cluster_codes[row]],
+            end_time=datetime.fromtimestamp(ended).strftime("%Y-%m-%dT%H:%M:%S") if ended else "",
+            array_job_id=array_job_id,
+            array_task_id=array_task_id
+        )
+
+    def order_by(self, column, reverse=False):
+        """Return row numbers sorted by a numeric column, e.g. ``"ended"``"""
+        values = getattr(self, column)
+        return sorted(range(len(self)), key=values.__getitem__, reverse=reverse)
+
+    def state_counts(self):
+        """Return the number of jobs in each state"""
+        counts = [0] * len(self.states.values)
+        for code in self.state_codes:
+            counts[code] += 1
+        return {state: count for state, count in zip(self.states.values, counts) if count}
+
+    def total(self, column, state=None):
+        """Sum a numeric column, optionally only over jobs in ``state``"""
+        values = getattr(self, column)
+        if state is None:
+            return sum(value for value in values if value > 0)
+        code = self.states._codes.get(state)
+        return sum(value for value, other in zip(values, self.state_codes)
+                   if other == code and value > 0)
+
+    def retain(self, rows):
+        """Keep only the given rows, in the given order.
+
+        Works on the columns directly; no JobInfo is built.
+        """
+        rows = list(rows)
+        kept = set(rows)
+        for row in range(len(self)):
+            if row not in kept:
+                self._index.discard(self._id_text.get(row, self.job_ids[row]))
+
+        for column in self._columns():
+            column[:] = array(column.typecode, map(column.__getitem__, rows))
+        self.names = [self.names[row] for row in rows]
+        self._id_text = {new: self._id_text[old] for new, old in enumerate(rows)
+                         if old in self._id_text}
+        self._array_ids = {new: self._array_ids[old] for new, old in enumerate(rows)
+                           if old in self._array_ids}
+        self.version += 1
+
+    def discard_ended_before(self, cutoff):
+        """Drop jobs that ended before ``cutoff`` (a Unix timestamp)"""
+        if any(ended < cutoff for ended in self.ended):
+            self.retain([row for row, ended in enumerate(self.ended) if ended >= cutoff])
+
+    def nbytes(self):
+        """Return the approximate size of the numeric columns in bytes"""
+        return sum(column.itemsize * len(column) for column in self._columns())
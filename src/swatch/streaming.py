@@ -0,0 +1,119 @@
+"""Push-based job streaming over one long-running remote channel.
+
+Instead of running squeue over a new channel on every refresh, a small awk
+loop is started on the login node. It runs squeue at the chosen cadence and
+writes only the rows that changed since the previous cycle:
+
+    +<squeue row>   job added or changed
+    -<job id>       job left the queue
+    !<status>       squeue failed this cycle; state is left untouched
+    .               end of a cycle
+
+The client keeps the current job table and reapplies each cycle's deltas.
+"""
+
+import shlex
+import threading
+
+from .jobs import parse_squeue_output
+
+# awk is available on every login node, unlike a predictable Python.
+# squeue's exit status is appended as a final "#rc" line so a failed call
+# is not mistaken for an empty queue.
+WATCH_PROGRAM = r'''BEGIN {
+    while (1) {
+        split("", cur); rc = -1
+        while ((cmd | getline line) > 0) {
+            if (line ~ /^#rc /) { rc = substr(line, 5) + 0; continue }
+            id = line; sub(/\|.*/, "", id)
+            cur[id] = line
+        }
+        close(cmd)
+        if (rc != 0) {
+            print "!" rc
+        } else {
+            for (id in cur) if (!(id in prev) || prev[id] != cur[id]) print "+" cur[id]
+            for (id in prev) if (!(id in cur)) print "-" id
+            split("", prev)
+            for (id in cur) prev[id] = cur[id]
+        }
+        print "."
+        fflush()
+        system("sleep " delay)
+    }
+}'''
+
+
+def build_watch_command(squeue_command, interval):
+    """Return a shell command that streams squeue deltas every ``interval`` s"""
+    cmd = f"{squeue_command}; echo \"#rc $?\""
+    return (f"awk -v cmd={shlex.quote(cmd)} -v delay={max(1, int(interval))} "
+            f"{shlex.quote(WATCH_PROGRAM)}")
+
+
+class JobStream:
+    """Apply streamed squeue deltas for one cluster on a background thread.
+
+    ``on_update`` is called with the full, current job list at the end of
+    every cycle that changed something; ``on_closed`` is called once if the
+    stream ends for any reason other than ``stop()``.
+    """
+
+    def __init__(self, client, interval, on_update, on_closed=None):
+        self.client = client
+        self.interval = interval
+        self.on_update = on_update
+        self.on_closed = on_closed
+
+        self._rows = {}
+        self._close = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the remote watcher and the reader thread"""
+        if self._stopped.is_set():
+            return False
+        stream = self.client.open_stream(self.client.watch_command(self.interval))
+        if stream is None:
+            return False
+        lines, self._close = stream
+        self._thread = threading.Thread(target=self._read, args=(lines,), daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop reading and close the remote channel"""
+        self._stopped.set()
+        if self._close:
+            self._close()
+
+    def _read(self, lines):
+        changed = True  # Always deliver the first cycle, even if empty
+        try:
+            for line in lines:
+                line = line.rstrip("\n")
+                if not line:
+                    continue
+                marker, payload = line[0], line[1:]
+                if marker == "+":
+                    self._rows[payload.split("|", 1)[0]] = payload
+                    changed = True
+                elif marker == "-":
+                    changed = self._rows.pop(payload, None) is not None or changed
+                elif marker == "!":
+                    print(f"squeue failed on {self.client.hostname} (status {payload})")
+                    if self.client.metrics is not None:
+                        self.client.metrics.observe_poll(self.client, None, None)
+                elif marker == "." and changed:
+                    jobs = parse_squeue_output("\n".join(self._rows.values()),
+                                               cluster=self.client.name)
+                    if self.client.metrics is not None:
+                        self.client.metrics.observe_poll(self.client, None, jobs)
+                    self.on_update(jobs)
+                    changed = False
+        except Exception as e:
+            if not self._stopped.is_set():
+                print(f"Job stream from {self.client.hostname} failed: {e}")
+        if not self._stopped.is_set() and self.on_closed:
+            self.on_closed()
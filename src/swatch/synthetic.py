@@ -0,0 +1,264 @@
+"""Synthetic Slurm workload for test mode.
+
+Simulates a user with anywhere from ten to a million jobs, a mix of plain
+jobs and job arrays, so refresh, parsing and rendering can be exercised at
+scale without a cluster. Each job moves through its states over time:
+pending, running, then completed, failed or timed out; a minute later it
+leaves squeue and is reported by sacct, and its slot is reused by a new
+submission, so the queue stays around the requested size.
+
+The queue is a pure function of the seed and the wall clock. Every call,
+and every process (see ``python -m swatch.synthetic``), sees the same jobs
+at the same moment, and nothing but the job parameters is kept in memory.
+"""
+
+import argparse
+import math
+import random
+import re
+import shlex
+import sys
+import time
+from datetime import datetime
+
+from .jobs import format_duration
+from .usage import test_sstat_output
+
+# First job id handed out
+BASE_JOB_ID = 1000000
+# Seconds between the starts of consecutive tasks of an array
+STAGGER = 20
+# Seconds a finished job stays visible in squeue
+LINGER = 60
+
+NAMES = ("align", "variant_call", "train_model", "preprocess", "simulate",
+         "render", "assemble", "blast_search", "md_run", "postprocess")
+MEMORY_SIZES = ("1000M", "2000M", "4G", "8G", "16G", "32G", "64G", "256G")
+TIME_LIMITS = (600, 1800, 3600, 4 * 3600, 12 * 3600, 86400, 3 * 86400)
+
+
+def _fraction(n):
+    """Deterministic, evenly spread value in [0, 1) for an integer"""
+    return (n * 0.6180339887498949) % 1.0
+
+
+class _Group:
+    """One plain job (size 1) or one job array, repeated every ``period`` s"""
+
+    __slots__ = ("id_offset", "size", "offset", "pending", "runtime", "limit",
+                 "period", "nodes", "cpus", "memory", "name")
+
+    def task_times(self, k):
+        """Return ``(start, end, state)`` of task ``k`` relative to submission"""
+        start = self.pending + k * STAGGER
+        runtime = self.runtime * (0.5 + _fraction(self.id_offset + k))
+        if runtime >= self.limit:
+            return start, start + self.limit, "TIMEOUT"
+        state = "FAILED" if _fraction(7 * (self.id_offset + k) + 3) < 0.05 else "COMPLETED"
+        return start, start + int(runtime), state
+
+
+class SyntheticCluster:
+    """Answer squeue, sacct and version commands from a simulated workload.
+
+    ``latency`` and ``jitter`` (seconds) are added to every command to mimic
+    a remote login node and a busy controller.
+    """
+
+    def __init__(self, jobs=1000, seed=0, latency=0.0, jitter=0.0, array_fraction=0.6):
+        self.jobs = jobs
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.array_fraction = array_fraction
+        self._groups = self._build()
+
+    @classmethod
+    def from_args(cls, args):
+        """Return a cluster for the ``--test-*`` options, or None if unused"""
+        if getattr(args, "test_jobs", None) is None:
+            return None
+        return cls(jobs=args.test_jobs, seed=args.test_seed,
+                   latency=args.test_latency, jitter=args.test_jitter)
+
+    def spawn(self, index):
+        """Return a cluster with the same settings but different jobs"""
+        return SyntheticCluster(self.jobs, self.seed + index, self.latency,
+                                self.jitter, self.array_fraction)
+
+    def _build(self):
+        rng = random.Random(self.seed)
+        groups = []
+        tasks = 0
+        id_offset = 0
+        while tasks < self.jobs:
+            group = _Group()
+            if rng.random() < self.array_fraction:
+                # Arrays range from a handful of tasks to large sweeps
+                group.size = min(self.jobs - tasks, int(10 ** rng.uniform(0.7, 3)))
+            else:
+                group.size = 1
+            group.id_offset = id_offset
+            group.limit = rng.choice(TIME_LIMITS)
+            group.runtime = group.limit * rng.uniform(0.1, 1.1)
+            group.pending = rng.uniform(0, 3600)
+            busy = group.pending + (group.size - 1) * STAGGER + group.limit + LINGER
+            group.period = busy + rng.uniform(0, 600)
+            group.offset = rng.uniform(0, group.period)
+            group.nodes = rng.choice((1, 1, 1, 2, 4))
+            group.cpus = group.nodes * rng.choice((1, 4, 8, 16, 32))
+            group.memory = rng.choice(MEMORY_SIZES)
+            group.name = f"{rng.choice(NAMES)}_{len(groups) % 100}"
+            groups.append(group)
+            tasks += group.size
+            # The array itself takes one id, each task another
+            id_offset += group.size + (group.size > 1)
+        self._id_span = id_offset
+        return groups
+
+    def _cycle(self, group, now):
+        """Return ``(cycle, submitted_at)`` of the group's current submission"""
+        cycle = math.floor((now - group.offset) / group.period)
+        return cycle, group.offset + cycle * group.period
+
+    def _job_id(self, group, cycle):
+        return BASE_JOB_ID + cycle * self._id_span + group.id_offset
+
+    def squeue(self, now=None, header=True):
+        """Return the queue at ``now`` in SQUEUE_FORMAT"""
+        now = now or time.time()
+        lines = ["JOBID|NAME|STATE|TIME|NODES|CPUS|MEMORY|TIME_LEFT|ARRAY_JOB_ID|ARRAY_TASK_ID"] if header else []
+        append = lines.append
+        for group in self._groups:
+            cycle, submitted = self._cycle(group, now)
+            elapsed = now - submitted
+            job_id = self._job_id(group, cycle)
+            resources = f"{group.nodes}|{group.cpus}|{group.memory}"
+            limit = format_duration(group.limit)
+            array = group.size > 1
+
+            for k in range(group.size):
+                start, end, final = group.task_times(k)
+                if elapsed < start:
+                    # squeue keeps the remaining pending tasks as one record
+                    task = f"{k + 1}-{group.size}" if array and k + 1 < group.size else str(k + 1)
+                    append(f"{job_id}|{group.name}|PENDING|0:00|{resources}|{limit}|"
+                           f"{job_id}|{task if array else 'N/A'}")
+                    break
+                if elapsed >= end + LINGER:
+                    continue
+                if elapsed < end:
+                    state, runtime = "RUNNING", int(elapsed - start)
+                else:
+                    state, runtime = final, end - start
+                task_id = job_id + k + 1 if array else job_id
+                append(f"{task_id}|{group.name}|{state}|{format_duration(runtime)}|{resources}|"
+                       f"{format_duration(max(0, group.limit - runtime))}|"
+                       f"{job_id}|{k + 1 if array else 'N/A'}")
+        return "\n".join(lines)
+
+    def sacct(self, since, now=None):
+        """Return the remote date line and sacct rows for jobs that ended after ``since``.
+
+        Only each group's current and previous submission are considered,
+        which covers any window shorter than a job's period.
+        """
+        now = now or time.time()
+        lines = [datetime.fromtimestamp(now).strftime("%Y-%m-%dT%H:%M:%S")]
+        for group in self._groups:
+            cycle, submitted = self._cycle(group, now)
+            for back in (1, 0):
+                job_id = self._job_id(group, cycle - back)
+                base = submitted - back * group.period
+                for k in range(group.size):
+                    start, end, state = group.task_times(k)
+                    ended = base + end
+                    if not since <= ended <= now:
+                        continue
+                    sacct_id = f"{job_id}_{k + 1}" if group.size > 1 else str(job_id)
+                    end_time = datetime.fromtimestamp(ended).strftime("%Y-%m-%dT%H:%M:%S")
+                    lines.append(f"{sacct_id}|{group.name}|{state}|{format_duration(end - start)}|"
+                                 f"{group.nodes}|{group.cpus}|{group.memory}|{end_time}")
+        return "\n".join(lines)
+
+    def run(self, command):
+        """Answer a remote command the way a login node would"""
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+        if command.startswith("squeue --version"):
+            return "slurm 23.02.6"
+        if command.startswith("squeue"):
+            return self.squeue(header=" -h" not in command)
+        if "squeue" in command:
+            return self._page(command)
+        if command.startswith("scontrol show job"):
+            return self.scontrol(command.split()[-1])
+        if command.startswith("sstat"):
+            return test_sstat_output(command.split()[-1].split(","))
+        if "sacct" in command:
+            return self.sacct(self._since(command))
+        return ""
+
+    def scontrol(self, job_id, now=None):
+        """Return an ``scontrol show job`` record for a queued job, or an empty string"""
+        base, _, task = job_id.partition("_")
+        for line in self.squeue(now, header=False).split("\n"):
+            fields = line.split("|")
+            if fields[0] == base or (task and fields[8] == base and fields[9] == task):
+                break
+        else:
+            return ""
+        job, name, state, runtime, nodes, cpus, memory, left, array_job, array_task = fields
+        workdir = f"/home/user/{name}"
+        running = state == "RUNNING"
+        return (f"JobId={job} ArrayJobId={array_job} ArrayTaskId={array_task} JobName={name}\n"
+                f"   UserId=user(1000) Account=synthetic\n"
+                f"   JobState={state} Reason={'Resources' if state == 'PENDING' else 'None'}\n"
+                f"   RunTime={runtime} TimeLimit={left}\n"
+                f"   Partition=compute NodeList={f'node[001-{int(nodes):03d}]' if running else '(null)'}\n"
+                f"   NumNodes={nodes} NumCPUs={cpus}\n"
+                f"   TRES=cpu={cpus},mem={memory},node={nodes}\n"
+                f"   WorkDir={workdir}\n"
+                f"   SubmitLine=sbatch {name}.sh\n"
+                f"   StdOut={workdir}/slurm-{job}.out")
+
+    def _page(self, command):
+        """Answer a paged squeue (see Scope.paginate)"""
+        rows = self.squeue(header=False).split("\n")
+        match = re.search(r"n > (\d+) && n <= (\d+)", command)
+        page = rows[int(match.group(1)):int(match.group(2))] if match else rows
+        if "#total" in command:
+            page.append(f"#total {len(rows)}")
+        return "\n".join(page)
+
+    @staticmethod
+    def _since(command):
+        match = re.search(r"-S (\S+)", command)
+        start = match.group(1) if match else ""
+        relative = re.match(r"now-(\d+)days$", start)
+        if relative:
+            return time.time() - int(relative.group(1)) * 86400
+        try:
+            return datetime.strptime(start, "%Y-%m-%dT%H:%M:%S").timestamp()
+        except ValueError:
+            return 0.0
+
+    def command_line(self):
+        """Return a shell command printing the current queue without a header"""
+        return (f"{shlex.quote(sys.executable)} -m swatch.synthetic --jobs {self.jobs} "
+                f"--seed {self.seed} --no-header")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print a synthetic squeue snapshot")
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-header", action="store_true")
+    args = parser.parse_args(argv)
+    print(SyntheticCluster(args.jobs, args.seed).squeue(header=not args.no_header))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Live tail of a job's output file, read incrementally over SFTP.
+
+Training logs grow to gigabytes, so the file is never read whole. The tail
+remembers its byte offset and each poll fetches only what was appended
+since. Only the last ``max_lines`` lines are kept. A tail that falls far
+behind jumps ahead rather than downloading output that would be scrolled
+away anyway.
+"""
+
+import codecs
+import time
+from collections import deque
+
+# Longest line kept whole; longer runs without a newline are split
+MAX_LINE = 64 * 1024
+
+
+class LogTail:
+    """Follow a growing remote file by byte offset.
+
+    ``read(path, offset, length)`` returns ``(size, data)`` or None, like
+    ``SlurmClient.read_remote_file``.
+    """
+
+    def __init__(self, read, path, max_lines=2000, backlog=64 * 1024, chunk=1024 * 1024):
+        self.read = read
+        self.path = path
+        self.lines = deque(maxlen=max_lines)
+        # Bytes shown when starting, or after jumping ahead
+        self.backlog = backlog
+        # Most bytes fetched per poll
+        self.chunk = chunk
+        self.offset = None
+        self._reset(skip_first_line=False)
+
+    def _reset(self, skip_first_line):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+        # A read starting mid-file begins with the rest of a line
+        self._skip_first_line = skip_first_line
+
+    def _seek_tail(self, size):
+        self.offset = max(0, size - self.backlog)
+        self._reset(skip_first_line=self.offset > 0)
+
+    def poll(self):
+        """Fetch what was appended since the last poll.
+
+        Returns the new complete lines, or None if the file cannot be read.
+        """
+        if self.offset is None:
+            stat = self.read(self.path, 0, 0)
+            if stat is None:
+                return None
+            self._seek_tail(stat[0])
+
+        result = self.read(self.path, self.offset, self.chunk)
+        if result is None:
+            return None
+        size, data = result
+
+        if size < self.offset:
+            # Truncated or replaced; start over from its beginning
+            self.offset = 0
+            self._reset(skip_first_line=False)
+            return self._add(["--- file truncated ---"])
+
+        behind = size - self.offset - len(data)
+        if behind > max(self.chunk, self.backlog):
+            self._seek_tail(size)
+            return self._add([f"--- skipped {behind + len(data):,} bytes ---"])
+
+        self.offset += len(data)
+        text = self._partial + self._decoder.decode(data)
+        parts = text.split("\n")
+        self._partial = parts.pop()
+        if len(self._partial) > MAX_LINE:
+            parts.append(self._partial)
+            self._partial = ""
+        if self._skip_first_line and parts:
+            parts.pop(0)
+            self._skip_first_line = False
+        # Progress bars redraw with \r; keep what the terminal would show
+        return self._add([part.rstrip("\r").rsplit("\r", 1)[-1] for part in parts])
+
+    def _add(self, lines):
+        self.lines.extend(lines)
+        return lines
+
+
+class GrowingTestLog:
+    """Stand-in for job output files in test mode: every file gains two lines a second"""
+
+    LINE = "step {:08d}  loss {:.6f}\n"
+
+    def __init__(self):
+        self._started = {}
+        self._width = len(self.LINE.format(0, 1.0))
+
+    def read(self, path, offset, length):
+        # Every file starts out with a minute of output
+        started = self._started.setdefault(path, time.time() - 60)
+        count = int((time.time() - started) * 2)
+        size = count * self._width
+        if length <= 0 or offset >= size:
+            return size, b""
+        first = offset // self._width
+        last = min(count, (offset + length) // self._width + 1)
+        text = "".join(self.LINE.format(i, 2.0 / (i + 1)) for i in range(first, last))
+        start = offset - first * self._width
+        return size, text.encode()[start:start + min(length, size - offset)]
@@ -0,0 +1,84 @@
+"""Per-refresh timing, to tell where a slow refresh spends its time.
+
+Each polled refresh records when it was requested, when the squeue command
+started and returned over SSH and how much it returned, when parsing and
+the sacct merge finished, when the UI thread picked the result up and when
+the table was redrawn. That separates a slow slurmctld or network (ssh)
+from slow parsing, a busy UI thread (wait) or slow Tk drawing (render).
+"""
+
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+
+from .client import CONFIG_DIR
+
+TIMING_LOG = os.path.join(CONFIG_DIR, "timings.log")
+
+
+class RefreshTiming:
+    """Monotonic timestamps of one refresh of one cluster"""
+
+    STAGES = ("enqueued", "exec_start", "exec_end", "parsed", "merged", "delivered", "rendered")
+    # (label, from stage, to stage)
+    SPANS = (
+        ("queue", "enqueued", "exec_start"),
+        ("ssh", "exec_start", "exec_end"),
+        ("parse", "exec_end", "parsed"),
+        ("history", "parsed", "merged"),
+        ("wait", "merged", "delivered"),
+        ("render", "delivered", "rendered"),
+        ("total", "enqueued", "rendered"),
+    )
+
+    __slots__ = ("cluster", "bytes") + STAGES
+
+    def __init__(self, cluster=""):
+        self.cluster = cluster
+        self.bytes = 0
+        for stage in self.STAGES:
+            setattr(self, stage, None)
+        self.enqueued = time.monotonic()
+
+    def mark(self, stage):
+        setattr(self, stage, time.monotonic())
+
+    def durations(self):
+        """Return ``{label: milliseconds}`` for every span whose ends were recorded"""
+        spans = {}
+        for label, start, end in self.SPANS:
+            start, end = getattr(self, start), getattr(self, end)
+            if start is not None and end is not None:
+                spans[label] = (end - start) * 1000
+        return spans
+
+    def summary(self):
+        """Return a short line for the status bar"""
+        parts = []
+        for label, ms in self.durations().items():
+            parts.append(f"{label} {ms:.0f} ms")
+            if label == "ssh":
+                parts.append(f"{self.bytes / 1024:.1f} KB")
+        return " · ".join(parts)
+
+    def log_line(self):
+        spans = " ".join(f"{label}={ms:.1f}ms" for label, ms in self.durations().items())
+        return f"{self.cluster or '-'} bytes={self.bytes} {spans}"
+
+
+def timing_logger(path=TIMING_LOG, max_bytes=1024 * 1024, backups=3):
+    """Return a logger that appends to a rotating timing log"""
+    logger = logging.getLogger("swatch.timings")
+    if not logger.handlers:
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+        except OSError as e:
+            print(f"Cannot write timing log {path}: {e}")
+            handler = logging.NullHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+    return logger
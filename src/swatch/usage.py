@@ -0,0 +1,190 @@
+"""Live CPU, memory and I/O of running jobs, sampled with one sstat call.
+
+A single ``sstat -j id1,id2,...`` per refresh covers every running job.
+sstat asks slurmd on each node, which can be slow, so it runs as its own
+call after squeue's rather than holding up the job table. Each job keeps
+a short, bounded series of samples, drawn as a sparkline in the job table
+so steadily growing memory is visible before the job is OOM-killed.
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+
+from .jobs import JobInfo, parse_duration, parse_memory_mb
+
+SSTAT_FIELDS = "JobID,NTasks,AveCPU,AveRSS,AveDiskRead,AveDiskWrite"
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+# sstat picks a unit per value; a bare number is bytes
+_SIZE_UNITS_MB = {"K": 1 / 1024, "M": 1, "G": 1024, "T": 1024 * 1024, "P": 1024 ** 3}
+
+# cpu: cores busy since the previous sample; rss_mb: resident memory now;
+# read/write: MB/s since the previous sample
+Sample = namedtuple("Sample", "time cpu rss_mb read_mb_s write_mb_s")
+
+
+def _cpu_seconds(value):
+    """Convert sstat CPU times such as ``1-02:03:04`` or ``01:02.345`` to seconds"""
+    whole, _, fraction = value.strip().partition(".")
+    seconds = parse_duration(whole)
+    if seconds is None:
+        return None
+    return seconds + (float(f"0.{fraction}") if fraction.isdigit() else 0.0)
+
+
+def _size_mb(value):
+    """Convert an sstat size such as ``1.50G`` or ``8192`` (bytes) to MB"""
+    value = value.strip()
+    if not value:
+        return 0.0
+    unit = value[-1].upper()
+    if unit in _SIZE_UNITS_MB:
+        return float(value[:-1]) * _SIZE_UNITS_MB[unit]
+    return float(value) / (1024 * 1024)
+
+
+def parse_sstat_output(output):
+    """Return ``{job_id: (cpu_seconds, rss_mb, read_mb, write_mb)}`` summed over steps"""
+    totals = {}
+    for line in output.splitlines():
+        parts = line.split("|")
+        if len(parts) < 6:
+            continue
+        step, ntasks, ave_cpu, ave_rss, ave_read, ave_write = parts[:6]
+        job_id = step.split(".", 1)[0]
+        try:
+            tasks = int(ntasks or 1)
+            cpu = _cpu_seconds(ave_cpu) or 0.0
+            rss = _size_mb(ave_rss)
+            read = _size_mb(ave_read)
+            write = _size_mb(ave_write)
+        except ValueError:
+            continue
+        # Ave* are per task; scale to the whole step
+        previous = totals.get(job_id, (0.0, 0.0, 0.0, 0.0))
+        totals[job_id] = (previous[0] + cpu * tasks, previous[1] + rss * tasks,
+                          previous[2] + read * tasks, previous[3] + write * tasks)
+    return totals
+
+
+def sparkline(values, limit=None):
+    """Draw ``values`` as block characters, full height at ``limit`` (default: the largest)"""
+    top = max(values, default=0) if not limit else limit
+    if top <= 0:
+        return SPARK_CHARS[0] * len(values)
+    last = len(SPARK_CHARS) - 1
+    return "".join(SPARK_CHARS[max(0, min(last, round(value / top * last)))] for value in values)
+
+
+def memory_limit_mb(job):
+    """Return the memory a job asked for in MB (squeue's figure is per node), or None"""
+    try:
+        per_node = parse_memory_mb(job.memory)
+        return per_node * max(1, int(job.nodes)) if per_node else None
+    except (ValueError, AttributeError):
+        return None
+
+
+class UsageSampler:
+    """Per-job usage series for one cluster, fed by a batched sstat probe.
+
+    Call ``track`` with every new job list, then run ``command`` on the
+    cluster and pass its output to ``apply``.
+    """
+
+    def __init__(self, history=30, max_jobs=500):
+        self.history = history
+        # Largest number of job ids put on one sstat command line
+        self.max_jobs = max_jobs
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._running = []
+        self._rotation = 0
+        self._series = {}
+        self._totals = {}
+
+    def track(self, jobs):
+        """Sample the running jobs in ``jobs`` from now on; forget the others"""
+        running = [job.job_id for job in jobs if job.status == "RUNNING" and job.end_time == ""]
+        with self._lock:
+            self._running = running
+            keep = set(running)
+            for job_id in [job_id for job_id in self._series if job_id not in keep]:
+                del self._series[job_id]
+                self._totals.pop(job_id, None)
+
+    def command(self):
+        """Return the sstat command for this refresh, or None if nothing runs"""
+        with self._lock:
+            if not self.enabled or not self._running:
+                return None
+            job_ids = self._running
+            if len(job_ids) > self.max_jobs:
+                # Take turns so every job is sampled every few refreshes
+                start = self._rotation % len(job_ids)
+                job_ids = (job_ids + job_ids)[start:start + self.max_jobs]
+                self._rotation += self.max_jobs
+        return f"sstat -a -n -P -o {SSTAT_FIELDS} -j {','.join(job_ids)}"
+
+    def apply(self, output, now=None):
+        """Add a sample per job from the sstat output (None if it failed)"""
+        if not output:
+            return
+        now = now or time.time()
+        with self._lock:
+            for job_id, totals in parse_sstat_output(output).items():
+                cpu_seconds, rss, read, write = totals
+                previous = self._totals.get(job_id)
+                self._totals[job_id] = (now, cpu_seconds, read, write)
+                if previous is None or now <= previous[0]:
+                    # Rates need two samples; show memory right away
+                    sample = Sample(now, 0.0, rss, 0.0, 0.0)
+                else:
+                    elapsed = now - previous[0]
+                    sample = Sample(now, max(0.0, cpu_seconds - previous[1]) / elapsed, rss,
+                                    max(0.0, read - previous[2]) / elapsed,
+                                    max(0.0, write - previous[3]) / elapsed)
+                series = self._series.get(job_id)
+                if series is None:
+                    series = self._series[job_id] = deque(maxlen=self.history)
+                series.append(sample)
+
+    def samples(self, job_id):
+        with self._lock:
+            return list(self._series.get(job_id, ()))
+
+    def summary(self, job):
+        """Return e.g. ``"▂▃▅▇ 12.4GB 3.9 cpu io 1.2/0.3 MB/s"``, or an empty string.
+
+        The sparkline is memory over time; a full bar means the job is at
+        the memory it requested. I/O is read/write since the previous sample.
+        """
+        samples = self.samples(job.job_id)
+        if not samples:
+            return ""
+        latest = samples[-1]
+        memory = sparkline([sample.rss_mb for sample in samples], memory_limit_mb(job))
+        return (f"{memory} {JobInfo.format_memory(f'{int(latest.rss_mb)}M')} {latest.cpu:.1f} cpu "
+                f"io {latest.read_mb_s:.1f}/{latest.write_mb_s:.1f} MB/s")
+
+
+def test_sstat_output(job_ids, now=None):
+    """Synthetic sstat rows for test mode; some jobs leak memory steadily"""
+    now = now or time.time()
+    lines = []
+    for job_id in job_ids:
+        seed = sum(ord(c) for c in job_id)
+        tasks = 1 + seed % 4
+        busy = 0.5 + (seed % 5) / 10
+        elapsed = now % 86400
+        rss = 500 + seed % 3000
+        if seed % 3 == 0:
+            # Grows by about 2 MB a second, wrapping every ten minutes
+            rss += int(now % 600) * 2
+        # AveRSS is per task
+        rss //= tasks
+        cpu = elapsed * busy
+        lines.append(f"{job_id}.batch|{tasks}|{int(cpu) // 3600:02d}:{int(cpu) // 60 % 60:02d}:"
+                     f"{cpu % 60:06.3f}|{rss}M|{elapsed * 0.2:.2f}M|{elapsed * 0.05:.2f}M")
+    return "\n".join(lines)